@@ -93,6 +93,23 @@ class SceneSettings(QtCore.QObject, SourceEntry):
             "value": "True",
             "flags": ["editable"]
         },
+        "preload_scenes": {
+            "type": "Array",
+            "flags": ["editable"],
+            "template": {
+                "scene": {
+                    "type": "Array_Element",
+                    "flags": ["editable"],
+                    "children": {
+                        "scene_file": {
+                            "type": "Scene",
+                            "value": "",
+                            "flags": ["editable"]
+                        }
+                    }
+                }
+            }
+        },
         "start_actions": {
             "type": "Array",
             "flags": ["editable", "no_exclusion"],
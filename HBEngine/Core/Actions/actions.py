@@ -13,8 +13,8 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import pygame.mixer
-import copy, operator
-from HBEngine.Core import settings
+import copy, functools, operator
+from HBEngine.Core import settings, tween
 from HBEngine.Core.Objects.renderable import Renderable
 from HBEngine.Core.Objects.renderable_sprite import SpriteRenderable
 from HBEngine.Core.Objects.renderable_text import TextRenderable
@@ -107,6 +107,122 @@ look like the following:
 """
 
 
+# -------------- ACTION DATA VALIDATION --------------
+
+# Validating action data against its 'ACTION_DATA' happens for every action performed, so each 'ACTION_DATA' structure is
+# compiled once into a flat "fill plan" of exactly what needs to be checked (See 'CompileFillPlan')
+#
+# Structure: {<id of the 'ACTION_DATA'>: (<'ACTION_DATA'>, <fill plan>)}
+fill_plans = {}
+
+# Project setting values used for parameters that fall back to a 'default'. These are kept up to date using the project
+# setting listeners, and are discarded if the project settings are reloaded
+#
+# Structure: {(<category>, <setting>): <value>}
+default_values = {}
+default_values_source = None
+
+
+def GetFillPlan(extended_ad: dict) -> dict:
+    """ Returns the fill plan for the provided Expanded format data, compiling it if it hasn't been already """
+    entry = fill_plans.get(id(extended_ad))
+    if entry and entry[0] is extended_ad:
+        return entry[1]
+
+    plan = CompileFillPlan(extended_ad)
+    fill_plans[id(extended_ad)] = (extended_ad, plan)
+
+    return plan
+
+
+def CompileFillPlan(extended_ad: dict) -> dict:
+    """
+    Walks the provided Expanded format data, and returns a fill plan describing how to validate the Simplified format
+    against it. Fill plans are in the form:
+        fills:          Parameters to fill if missing, either with their 'value', or with the project setting their
+                        'default' refers to. [(<param_name>, <value>, (<category>, <setting>) or None), ...]
+        connections:    Parameters that may hold a connection to evaluate. [<param_name>, ...]
+        children:       Parameters with children to validate if present. [(<param_name>, <fill plan>), ...]
+        templates:      Parameters with template-generated children to validate. [(<param_name>, <fill plan>), ...]
+    """
+    plan = {"fills": [], "connections": [], "children": [], "templates": []}
+
+    for param_name, param_data in extended_ad.items():
+        if "children" in param_data:
+            plan["children"].append((param_name, CompileFillPlan(param_data["children"])))
+
+        elif "template" in param_data:
+            # Parameters that use templates have a unique data structure in that each child is
+            # generated from the template instead of being a part of the data to begin with. Due to this,
+            # we must compare the simplified data against the template specifically
+            #
+            # The template data structure is usually a few layers deep. Example:
+            #    choices: (Array)
+            #        choice: (ArrayElement)
+            #            ...
+
+            # Because the top level key names for ArrayElements are generated, we can't do a typical key name
+            # search (IE. 'choice_01' instead of 'choice' which matches the ACTION_DATA). Instead, we're accessing
+            # the values dict directly. Skip a level as this is the "ArrayElement" container
+            template_data = list(param_data["template"].values())[0]
+            plan["templates"].append((param_name, CompileFillPlan(template_data["children"])))
+
+        else:
+            # If the param isn't edited by the user, it won't be in the simplified data. Likely scenarios:
+            # 1. Param is managed by the action and not editable by user, thus not included in the file
+            # 2. User left the param unedited and the editor removed it during saving as an optimization
+            #
+            # In either case, use the original value from the ACTION_DATA, falling back to its default
+            if "value" in param_data:
+                plan["fills"].append((param_name, param_data["value"], None))
+            else:
+                plan["fills"].append((param_name, None, tuple(param_data["default"])))
+
+            # Only connectable params can be saved with a connection
+            if "connection" in param_data:
+                plan["connections"].append(param_name)
+
+    return plan
+
+
+def ApplyFillPlan(plan: dict, simplified_ad: dict):
+    """ Updates the provided Simplified format data using the provided fill plan """
+    for param_name, value, default in plan["fills"]:
+        if param_name not in simplified_ad:
+            simplified_ad[param_name] = GetDefaultValue(*default) if default else value
+
+    # Evaluate any connections if applicable
+    for param_name in plan["connections"]:
+        value = simplified_ad.get(param_name)
+        if isinstance(value, Connection):
+            simplified_ad[param_name] = settings.GetVariable(value.variable)
+
+    for param_name, child_plan in plan["children"]:
+        if param_name in simplified_ad:
+            ApplyFillPlan(child_plan, simplified_ad[param_name])
+
+    for param_name, element_plan in plan["templates"]:
+        for element_name, element_data in simplified_ad[param_name].items():
+            ApplyFillPlan(element_plan, element_data)
+
+
+def GetDefaultValue(category: str, setting: str) -> any:
+    """ Returns the value of the provided project setting, caching it for subsequent lookups """
+    global default_values_source
+
+    # Reloading the project settings replaces them (And their listeners) entirely
+    if default_values_source is not settings.project_settings:
+        default_values.clear()
+        default_values_source = settings.project_settings
+
+    key = (category, setting)
+    if key not in default_values:
+        default_values[key] = settings.GetProjectSetting(category, setting)
+        settings.project_setting_listeners[category][setting]["action_defaults"] = functools.partial(default_values.__setitem__, key)
+
+    return default_values[key]
+
+
 # -------------- BASE ACTIONS --------------
 
 
@@ -134,6 +250,13 @@ class Action:
     def Complete(self):
         self.complete = True
 
+    def GetWakeDelay(self) -> float:
+        """
+        Returns how long (In seconds) this action can go without being updated, allowing the game loop to sleep while
+        waiting for input. Returns 'None' if it needs to be updated every frame
+        """
+        return None
+
     def AddToScene(self, new_renderable):
         """ Adds the provided renderable either to the scene's draw stack, or to 'self.parent' as a child """
         if self.parent:
@@ -151,57 +274,16 @@ class Action:
 
     def ValidateActionData(self, extended_ad: dict, simplified_ad: dict = None):
         """
-        Recursively compares the action's 'simplified_ad' against the provided 'ext_ad', updating the former when
-        it is missing data found in the latter
+        Compares the action's 'simplified_ad' against the provided 'ext_ad', updating the former when it is missing data
+        found in the latter
 
         This update performs the following adjustments:
         - Adds parameters that are missing from the Simplified format using the unedited data from the Expanded format
         - Replaces values with global values if a parameter is using a global setting
-        """
 
-        for param_name, param_data in extended_ad.items():
-            if "children" in param_data:
-                if param_name in simplified_ad:
-                    # Param found in simplified data. Recursively update the children as well
-                    self.ValidateActionData(param_data["children"], simplified_ad[param_name])
-
-            elif "template" in param_data:
-                # Parameters that use templates have a unique data structure in that each child is
-                # generated from the template instead of being a part of the data to begin with. Due to this,
-                # we must compare the simplified data against the template specifically
-                #
-                # The template data structure is usually a few layers deep. Example:
-                #    choices: (Array)
-                #        choice: (ArrayElement)
-                #            ...
-
-                # Because the top level key names for ArrayElements are generated, we can't do a typical key name
-                # search (IE. 'choice_01' instead of 'choice' which matches the ACTION_DATA). Instead, we're accessing
-                # the values dict directly
-                template_data = list(param_data["template"].values())[0]
-
-                # Update each ArrayElement
-                for element_name, element_data in simplified_ad[param_name].items():
-                    # Skip a level as this is the "ArrayElement" container
-                    self.ValidateActionData(template_data["children"], element_data)
-
-            elif param_name not in simplified_ad:
-                # Param was not edited by the user. Let's try to infer *why* it wasn't
-                #
-                # Likely scenarios:
-                # 1. Param is managed by the action and not editable by user, thus not included in the file
-                # 2. User left the param unedited and the editor removed it during saving as an optimization
-                if "value" in param_data:
-                    # Use the original value from the ACTION_DATA
-                    simplified_ad[param_name] = param_data['value']
-                else:
-                    # Fallback to the default from the ACTION_DATA
-                    simplified_ad[param_name] = settings.GetProjectSetting(param_data["default"][0], param_data["default"][1])
-            else:
-                #@TODO: Evaluate performance consequences and general implementation details here as it performs this type check for *every* parameter
-                # Evaluate any connections if applicable.
-                if isinstance(simplified_ad[param_name], Connection):
-                    simplified_ad[param_name] = settings.GetVariable(simplified_ad[param_name].variable)
+        The Expanded format is only walked once per action type. See 'CompileFillPlan'
+        """
+        ApplyFillPlan(GetFillPlan(extended_ad), simplified_ad)
 
 
 class SoundAction(Action):
@@ -292,10 +374,11 @@ class remove_renderable(Action):
 
                 # Merge the surfaces, then delete the child (Grim, I know)
                 for child in children:
-                    renderable.surface.blit(child.GetSurface(), (child.rect.x, child.rect.y))
+                    renderable.surface.blit(child.GetRenderSurface(), (child.rect.x, child.rect.y))
                     settings.scene.active_renderables.Remove(child.key)
 
                 renderable.visible = True
+                settings.scene.Invalidate(renderable)
 
             from HBEngine.Core import action_manager
             self.active_transition = action_manager.CreateTransition(self.simplified_ad["transition"], renderable)
@@ -307,12 +390,13 @@ class remove_renderable(Action):
                     settings.scene.active_renderables.Remove(child.key)
 
             settings.scene.active_renderables.Remove(self.simplified_ad["key"])
-            settings.scene.Draw()
+            settings.scene.Invalidate()
             self.Complete()
 
     def Update(self, events):
         if self.active_transition.complete is True:
             settings.scene.active_renderables.Remove(self.simplified_ad["key"])
+            settings.scene.Invalidate()
             self.Complete()
         else:
             self.active_transition.Update()
@@ -362,6 +446,11 @@ class create_sprite(Action):
             "connection": "",
             "flags": ["editable", "connectable"],
         },
+        "static": {
+            "type": "Bool",
+            "value": False,
+            "flags": ["editable"],
+        },
         "transition": {
             "type": "Container",
             "flags": ["editable", "preview"],
@@ -427,7 +516,7 @@ class create_sprite(Action):
                 self.active_transition = action_manager.CreateTransition(self.simplified_ad["transition"], new_sprite)
                 self.active_transition.Start()
             else:
-                settings.scene.Draw()
+                settings.scene.Invalidate()
                 self.Complete()
         else:
             self.Complete()
@@ -484,6 +573,11 @@ class create_background(Action):
             "value": False,
             "flags": ["editable"]
         },
+        "static": {
+            "type": "Bool",
+            "value": False,
+            "flags": ["editable"]
+        },
         "conditions": {
             "type": "Array",
             "flags": ["editable"],
@@ -524,7 +618,7 @@ class create_background(Action):
 
         self.AddToScene(new_sprite)
         if not self.no_draw:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
         self.Complete()
         return new_sprite
@@ -569,6 +663,11 @@ class create_interactable(Action):
             "connection": "",
             "flags": ["editable", "connectable", "preview"],
         },
+        "hit_mask": {
+            "type": "Bool",
+            "value": False,
+            "flags": ["editable"]
+        },
         "z_order": {
             "type": "Int",
             "value": 0,
@@ -649,7 +748,7 @@ class create_interactable(Action):
 
         self.AddToScene(new_renderable)
         if not self.no_draw:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
         self.Complete()
         return new_renderable
@@ -721,7 +820,7 @@ class create_text(Action):
                 "type": {
                     "type": "Dropdown",
                     "value": "None",
-                    "options": ["None", "fade_in"],
+                    "options": ["None", "fade_in", "text_loading"],
                     "flags": ["editable", "preview"],
                 },
                 "speed": {
@@ -775,7 +874,7 @@ class create_text(Action):
                 self.active_transition = action_manager.CreateTransition(self.simplified_ad["transition"], new_text_renderable)
                 self.active_transition.Start()
             else:
-                settings.scene.Draw()
+                settings.scene.Invalidate()
                 self.Complete()
         else:
             self.Complete()
@@ -835,6 +934,11 @@ class create_button(Action):
             "connection": "",
             "flags": ["editable", "connectable"],
         },
+        "hit_mask": {
+            "type": "Bool",
+            "value": False,
+            "flags": ["editable"]
+        },
         "z_order": {
             "type": "Int",
             "default": ["Default Variables - Button", "button_z_order"],
@@ -978,7 +1082,7 @@ class create_button(Action):
 
         self.AddToScene(new_renderable)
         if not self.no_draw:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
         self.Complete()
         return new_renderable
@@ -1126,7 +1230,7 @@ class create_text_button(Action):
 
         self.AddToScene(new_renderable)
         if not self.no_draw:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
         self.Complete()
         return new_renderable
@@ -1248,7 +1352,7 @@ class create_checkbox(Action):
 
         self.AddToScene(new_renderable)
         if not self.no_draw:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
         self.Complete()
         return new_renderable
@@ -1437,7 +1541,7 @@ class dialogue(Action):
                         "type": {
                             "type": "Dropdown",
                             "default": ["Default Variables - Dialogue", "transition_type"],
-                            "options": ["fade_in", "None"],
+                            "options": ["fade_in", "text_loading", "None"],
                             "flags": ["editable"],
                         },
                         "speed": {
@@ -1499,7 +1603,7 @@ class dialogue(Action):
             self.active_transition = action_manager.CreateTransition(self.simplified_ad["dialogue"]["transition"], new_dialogue_text)
             self.active_transition.Start()
         else:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
             self.Complete()
 
         return None
@@ -1695,7 +1799,7 @@ class choice(Action):
         # Add the choice parent object to the render stack
         settings.scene.active_renderables.Add(new_renderable)
 
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
 
         return new_renderable
@@ -1755,7 +1859,7 @@ class switch_branch(Action):
         # Request that the Dialogue module load the given branch
         settings.modules[m_dialogue.Dialogue.MODULE_NAME].SwitchDialogueBranch(self.simplified_ad['branch'])
 
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
 
         return None
@@ -2161,6 +2265,11 @@ class load_scene(Action):
             "value": "",
             "flags": ["editable", "preview"],
         },
+        "loading_interface": {
+            "type": "Interface",
+            "value": "",
+            "flags": ["editable"],
+        },
         "conditions": {
             "type": "Array",
             "flags": ["editable"],
@@ -2195,7 +2304,8 @@ class load_scene(Action):
     def Start(self):
         self.skippable = False
 
-        settings.scene.SwitchScene(self.simplified_ad["scene_file"])
+        # The scene is preloaded before the switch happens. Large scenes may provide an interface to show in the meantime
+        settings.scene.SwitchScene(self.simplified_ad["scene_file"], self.simplified_ad.get("loading_interface"))
         self.Complete()
 
 
@@ -2257,6 +2367,13 @@ class wait(Action):
     def Skip(self):
         self.Complete()
 
+    def GetWakeDelay(self) -> float:
+        """ Override: Nothing changes until the time is up """
+        if self.complete:
+            return None
+
+        return self.target - self.counter
+
 
 class quit_game(Action):
     """
@@ -2350,27 +2467,17 @@ class scene_fade_in(Action):
         new_sprite = SpriteRenderable(renderable_data=self.simplified_ad)
 
         self.AddToScene(new_sprite)
-        settings.scene.Draw()
+        settings.scene.Invalidate()
 
         self.renderable = new_sprite
-        self.progress = self.renderable.GetSurface().get_alpha()
-        self.goal = 0
+        self.fade = tween.Play(
+            tween.Tween(new_sprite, "alpha", 0, new_sprite.alpha / self.speed, on_complete=self.Complete)
+        )
 
         return new_sprite
 
-    def Update(self, events):
-        self.progress -= (self.speed * settings.scene.delta_time)
-        self.renderable.GetSurface().set_alpha(self.progress)
-
-        settings.scene.Draw()
-
-        if self.progress <= self.goal:
-            self.Complete()
-
     def Skip(self):
-        self.renderable.GetSurface().set_alpha(self.goal)
-        settings.scene.Draw()
-        self.Complete()
+        self.fade.Skip()
 
 
 class scene_fade_out(Action):
@@ -2441,30 +2548,18 @@ class scene_fade_out(Action):
             self.speed = self.simplified_ad['speed']
 
         new_sprite = SpriteRenderable(renderable_data=self.simplified_ad)
-        new_sprite.GetSurface().set_alpha(0)
+        new_sprite.alpha = 0
 
         self.AddToScene(new_sprite)
-        settings.scene.Draw()
+        settings.scene.Invalidate()
 
         self.renderable = new_sprite
-        self.progress = 0
-        self.goal = 256
+        self.fade = tween.Play(tween.Tween(new_sprite, "alpha", 256, 256 / self.speed, on_complete=self.Complete))
 
         return new_sprite
 
-    def Update(self, events):
-        self.progress += (self.speed * settings.scene.delta_time)
-        self.renderable.GetSurface().set_alpha(self.progress)
-
-        settings.scene.Draw()
-
-        if self.progress >= self.goal:
-            self.Complete()
-
     def Skip(self):
-        self.renderable.GetSurface().set_alpha(self.goal)
-        settings.scene.Draw()
-        self.Complete()
+        self.fade.Skip()
 
 
 # -------------- INTERFACE ACTIONS --------------
@@ -2485,7 +2580,7 @@ class load_interface(Action):
             interface_file=self.simplified_ad["interface_file"],
             parent=self.parent
         )
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
         return new_interface
 
@@ -2506,7 +2601,7 @@ class unload_interface(Action):
             key_to_remove=self.simplified_ad["key"],
             parent=self.parent
         )
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
         return new_interface
 
@@ -2584,7 +2679,7 @@ class switch_page(Action):
         if self.simplified_ad["owner"] in settings.scene.active_interfaces:
             settings.scene.active_interfaces[self.simplified_ad["owner"]].LoadPage(self.simplified_ad["page"])
 
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
         return None
 
@@ -2633,6 +2728,6 @@ class remove_page(Action):
         if self.simplified_ad["owner"] in settings.scene.active_interfaces:
             settings.scene.active_interfaces[self.simplified_ad["owner"]].RemovePage(self.simplified_ad["page"])
 
-        settings.scene.Draw()
+        settings.scene.Invalidate()
         self.Complete()
         return None
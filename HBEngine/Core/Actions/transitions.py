@@ -12,14 +12,20 @@
     You should have received a copy of the GNU General Public License
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
-from HBEngine.Core import settings
+from HBEngine.Core import tween
 
 
 class Transition:
+    """
+    The base class for transitions. Transitions animate a renderable as it's added to or removed from the scene, and are
+    expressed as tweens (See 'tween'), which are advanced by the engine rather than by the transition itself. The
+    'speed' is measured in units of the animated property per second
+    """
     def __init__(self, renderable, speed=5):
         self.renderable = renderable
         self.speed = speed
 
+        self.active_tween = None
         self.complete = False
 
     def Start(self):
@@ -29,83 +35,42 @@ class Transition:
         pass
 
     def Skip(self):
-        pass
-
+        if self.active_tween:
+            self.active_tween.Skip()
 
-class fade_in(Transition):
-    def __init__(self, renderable, speed=5):
-        super().__init__(renderable, speed)
+    def OnComplete(self):
+        print("Transition Complete")
+        self.complete = True
 
-        self.progress = 0
-        self.goal = 256
 
+class fade_in(Transition):
     def Start(self):
         # Start the fade in at 0 opacity
-        self.renderable.GetSurface().set_alpha(0)
-        settings.scene.Draw()
-
-    def Update(self):
-        self.progress += (self.speed * settings.scene.delta_time)
-        self.renderable.GetSurface().set_alpha(self.progress)
-
-        settings.scene.Draw()
-
-        if self.progress >= self.goal:
-            print("Transition Complete")
-            self.complete = True
+        self.active_tween = tween.Play(
+            tween.Tween(self.renderable, "alpha", 256, 256 / self.speed, start=0, on_complete=self.OnComplete)
+        )
         # TODO: If you have an unload and load action next to eachother withou a pause, and those two actions refer to
         # TODO: the same key, they'll attempt to overrid eachother. We need a function for "wait" that works alongside
         # TODO: "wait_for_input"
 
-    def Skip(self):
-        self.renderable.GetSurface().set_alpha(self.goal)
-        settings.scene.Draw()
-        self.complete = True
-
 
 class fade_out(Transition):
-    def __init__(self, renderable, speed=5):
-        super().__init__(renderable, speed)
-
-        self.progress = self.renderable.GetSurface().get_alpha()
-        self.goal = 0
-
-    def Update(self):
-        self.progress -= (self.speed * settings.scene.delta_time)
-        self.renderable.GetSurface().set_alpha(self.progress)
-
-        settings.scene.Draw()
-
-        if self.progress <= self.goal:
-            print("Transition Complete")
-            self.complete = True
-
-    def Skip(self):
-        self.renderable.GetSurface().set_alpha(self.goal)
-        settings.scene.Draw()
-        self.complete = True
+    def Start(self):
+        self.active_tween = tween.Play(
+            tween.Tween(self.renderable, "alpha", 0, self.renderable.alpha / self.speed, on_complete=self.OnComplete)
+        )
 
 
 class text_loading(Transition):
     """ Reveals each letter of a text renderable's text sequentially based on the provided transition speed """
-    def __init__(self, renderable, speed=5):
-        super().__init__(renderable, speed)
-
-        self.progress = ""
-        self.goal = 0
-
-    def Update(self):
-        self.progress -= (self.speed * settings.scene.delta_time)
-        self.renderable.GetSurface().set_alpha(self.progress)
-
-        settings.scene.Draw()
-
-        if self.progress <= self.goal:
-            print("Transition Complete")
-            self.complete = True
-
-    def Skip(self):
-        self.renderable.GetSurface().set_alpha(self.goal)
-        settings.scene.Draw()
-        self.complete = True
-
+    def Start(self):
+        self.active_tween = tween.Play(
+            tween.Tween(
+                self.renderable,
+                "visible_characters",
+                len(self.renderable.text),
+                len(self.renderable.text) / self.speed,
+                start=0,
+                on_complete=self.OnComplete
+            )
+        )
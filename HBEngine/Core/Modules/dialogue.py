@@ -13,7 +13,7 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import pygame
-from HBEngine.Core import settings, action_manager
+from HBEngine.Core import settings, action_manager, input_router
 from Tools.HBYaml.hb_yaml import Reader
 from HBEngine.Core.Objects.renderable import Renderable
 from HBEngine.Core.Objects.interface import Interface
@@ -53,6 +53,7 @@ class Dialogue:
             del settings.scene.active_interfaces[self.interface.key]
         self.root_renderable = None
         self.interface = None
+        settings.scene.Invalidate()
 
     def Update(self, events):
         for event in events:
@@ -68,15 +69,9 @@ class Dialogue:
                     else:
                         self.LoadAction()
 
-        # Update the AM and all child renderables (if applicable) since we reserve input with this module
+        # Update the AM and route input to all child renderables (if applicable) since we reserve input with this module
         action_manager.Update(events)
-        if self.root_renderable: self.UpdateRenderables([self.root_renderable])
-
-    def UpdateRenderables(self, target: list = None):
-        for renderable in target:
-            renderable.update()
-            if renderable.children:
-                self.UpdateRenderables(renderable.children)
+        if self.root_renderable: input_router.Update(events, [self.root_renderable])
 
     def LoadAction(self):
         """
@@ -1,11 +1,12 @@
 import pygame.mixer
-from HBEngine.Core import settings
+from HBEngine.Core import settings, sound_cache
 
 
 class Sound(pygame.mixer.Sound):
     """ A subclass for the pygame Sound object with extra functionality for muting and identification """
     def __init__(self, sound_data: dict):
-        super().__init__(settings.ConvertPartialToAbsolutePath(sound_data["sound"]))
+        # Create the sound from cached samples so the file is only decoded once
+        super().__init__(buffer=sound_cache.Load(settings.ConvertPartialToAbsolutePath(sound_data["sound"])))
 
         self.sound_data = sound_data
         self.key = ""
@@ -12,6 +12,7 @@
     You should have received a copy of the GNU General Public License
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
+from HBEngine.Core import settings
 from HBEngine.Core.DataTypes.input_states import State
 from HBEngine.Core.Objects.renderable import Renderable
 from HBEngine.Core.Objects.interactable import Interactable
@@ -48,6 +49,11 @@ class Button(Interactable):
 
         self.children.append(self.button_text_renderable)
 
+        # The text surfaces for each state, rendered on first use. Only the text color differs between states, so once
+        # each state has been rendered, state changes simply swap between them
+        self.text_surfaces = {State.normal: self.button_text_renderable.surface}
+        self.text_surfaces_text = self.button_text_renderable.text
+
         # If the button doesn't make use of a sprite surface, then use the button text surface instead (This allows for
         # text-only buttons)
         if self.surface.get_width() == 0 and self.surface.get_height() == 0:
@@ -63,14 +69,26 @@ class Button(Interactable):
     def ChangeState(self, new_state: State):
         # We need to intercept the state change in order to update the button_text state as well
         if new_state != self.state:
+            text_renderable = self.button_text_renderable
             if new_state == State.normal:
-                self.button_text_renderable.text_color = self.button_text_renderable.renderable_data["text_color"]
+                text_renderable.text_color = text_renderable.renderable_data["text_color"]
             elif new_state == State.hover:
-                self.button_text_renderable.text_color = self.button_text_renderable.renderable_data["text_color_hover"]
+                text_renderable.text_color = text_renderable.renderable_data["text_color_hover"]
             elif new_state == State.pressed:
-                self.button_text_renderable.text_color = self.button_text_renderable.renderable_data["text_color_clicked"]
+                text_renderable.text_color = text_renderable.renderable_data["text_color_clicked"]
+
+            # Any previously rendered surfaces are stale if the text has since changed
+            if text_renderable.text != self.text_surfaces_text:
+                self.text_surfaces.clear()
+                self.text_surfaces_text = text_renderable.text
+
+            if new_state in self.text_surfaces:
+                text_renderable.surface = self.text_surfaces[new_state]
+            else:
+                text_renderable.WrapText()
+                self.text_surfaces[new_state] = text_renderable.surface
 
-        self.button_text_renderable.WrapText()
+            settings.scene.Invalidate(text_renderable)
 
         super().ChangeState(new_state)
 
@@ -35,7 +35,7 @@ class Checkbox(Interactable):
                 self.check_icon_renderable.visible = True
 
         super().Interact()
-        settings.scene.Draw()  # Draw to apply the icon changes
+        settings.scene.Invalidate(self.check_icon_renderable)
 
     def ConnectionUpdate(self, new_value):
         if isinstance(new_value, bool):
@@ -13,7 +13,7 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import pygame
-from HBEngine.Core import settings, action_manager
+from HBEngine.Core import settings, action_manager, surface_cache, input_router
 from HBEngine.Core.DataTypes.input_states import State
 from HBEngine.Core.Objects.renderable import Renderable
 from HBEngine.Core.Objects.renderable_sprite import SpriteRenderable
@@ -31,9 +31,12 @@ class Interactable(SpriteRenderable):
 
         self.state = State.normal
 
-        # Track whether the previous input frame was clicking to determine whether this interactable was clicked
+        # Track whether this interactable is being clicked. Input is delivered by the input router (See 'OnPress')
         self.isClicking = False
 
+        # Whether only the opaque parts of the sprite respond to the mouse, rather than its entire rect
+        self.use_hit_mask = self.renderable_data.get("hit_mask", False)
+
         # Since interactions can contain any number of resulting actions, store the list of actions here
         self.interact_events = []
 
@@ -53,33 +56,41 @@ class Interactable(SpriteRenderable):
         # Defer the resize until we're able to define the interactive surfaces
         self.RecalculateSize(settings.resolution_multiplier)
 
-    def update(self, *args):
-        super().update()
-        if not settings.scene.stop_interactions:
-            # If being hovered...
-            if self.rect.collidepoint(pygame.mouse.get_pos()):
-                # If not already in the hover state...
-                if self.state is State.normal:
-                    self.ChangeState(State.hover)
-                else:  # Track whether the user has released their cursor over the sprite
-                    if pygame.mouse.get_pressed()[0] == 1:
-                        # Begin the click
-                        self.ChangeState(State.pressed)
-                        self.isClicking = True
-                    elif pygame.mouse.get_pressed()[0] == 0 and self.isClicking is True:
-                        # User has released the mouse after clicking this renderable. Reset state
-                        self.ChangeState(State.hover)
-                        self.isClicking = False
-                        self.Interact()
-                    elif self.isClicking is True:
-                        # End the click
-                        self.ChangeState(State.normal)
-                        self.isClicking = False
-
-            # If no longer hovering...
-            elif self.state is not State.normal:
-                self.isClicking = False
-                self.ChangeState(State.normal)
+    def OnEnter(self, pressed: bool):
+        """ Called by the input router when the mouse moves over this interactable """
+        # Returning with the button still held after pressing this interactable resumes the click
+        self.ChangeState(State.pressed if pressed else State.hover)
+
+    def OnLeave(self):
+        """ Called by the input router when the mouse moves off this interactable. Any click in progress is paused """
+        if self.state is not State.normal:
+            self.ChangeState(State.normal)
+
+    def OnPress(self):
+        """ Called by the input router when the left mouse button is pressed over this interactable """
+        self.ChangeState(State.pressed)
+        self.isClicking = True
+
+    def OnRelease(self):
+        """ Called by the input router when the left mouse button is released over this interactable after pressing it """
+        self.ChangeState(State.hover)
+        self.isClicking = False
+        self.Interact()
+
+    def GetDirtyRects(self) -> list:
+        """ Override: Let the input router know if this interactable has moved or resized since it was indexed """
+        dirty_rects = super().GetDirtyRects()
+        if dirty_rects:
+            input_router.CheckRect(self)
+
+        return dirty_rects
+
+    def GetHitSurface(self) -> pygame.Surface:
+        """
+        Returns the surface whose opaque pixels make up the interactive area when using a hit mask. This is the surface
+        as it's drawn, so the area follows the flip, tint and scale
+        """
+        return self.GetRenderSurface()
 
     def RecalculateSize(self, multiplier):
         # Call the parent function to recalculate the base surface
@@ -92,8 +103,10 @@ class Interactable(SpriteRenderable):
 
         # Recalculate each of the interactable states
         if multiplier != 1:
-            self.scaled_hover_surface = self.GetRescaledSurface(multiplier, self.hover_surface)
-            self.scaled_clicked_surface = self.GetRescaledSurface(multiplier, self.clicked_surface)
+            if self.hover_surface:
+                self.scaled_hover_surface = self.GetRescaledSurface(self.hover_surface, multiplier)
+            if self.clicked_surface:
+                self.scaled_clicked_surface = self.GetRescaledSurface(self.clicked_surface, multiplier)
 
     def Interact(self):
         # Events can either be supplied as an array under the plural form "events", or singularly as "event"
@@ -117,12 +130,12 @@ class Interactable(SpriteRenderable):
                     action_manager.PerformAction(action_data=self.interact_events[0], action_name=self.interact_events[0]["action"])
                     self.ContinueInteract()
             else:
-                settings.scene.Draw()
+                settings.scene.Invalidate()
         elif "event" in self.renderable_data:
             event_data = self.renderable_data["event"]
             action_manager.PerformAction(action_data=event_data, action_name=event_data["action"])
         else:
-            settings.scene.Draw()
+            settings.scene.Invalidate()
 
     def ContinueInteract(self):
         self.interact_events.pop(0)
@@ -142,7 +155,7 @@ class Interactable(SpriteRenderable):
         if "sprite_hover" in self.renderable_data:
             hover_sprite = settings.ConvertPartialToAbsolutePath(self.renderable_data["sprite_hover"])
             if self.renderable_data['sprite_hover'] != "None" and self.renderable_data['sprite_hover'] != "":
-                self.hover_surface = pygame.image.load(hover_sprite).convert_alpha()
+                self.hover_surface = surface_cache.Load(hover_sprite, self)
             else:
                 self.hover_surface = self.surface
         else:
@@ -151,7 +164,7 @@ class Interactable(SpriteRenderable):
         if 'sprite_clicked' in self.renderable_data:
             clicked_sprite = settings.ConvertPartialToAbsolutePath(self.renderable_data["sprite_clicked"])
             if self.renderable_data['sprite_clicked'] != "None" and self.renderable_data['sprite_clicked'] != "":
-                self.clicked_surface = pygame.image.load(clicked_sprite).convert_alpha()
+                self.clicked_surface = surface_cache.Load(clicked_sprite, self)
             else:
                 self.clicked_surface = self.surface
         else:
@@ -185,26 +198,4 @@ class Interactable(SpriteRenderable):
         """ Updates the active interact state with the provided state, refreshing the active surface """
         self.SetActiveSurface(self.GetStateSurface(new_state))
         self.state = new_state
-        settings.scene.Draw()
-
-    def Flip(self):
-        # Completely override the parent, as interactables use a cached original surface instead of explicitly using
-        # the active surface
-        print("Flipping Interactable")
-        if self.scaled_original_surface:
-            self.scaled_original_surface = pygame.transform.flip(self.scaled_original_surface, True, False)
-        else:
-            print("Flipping Interactale Original Surface")
-            self.original_surface = pygame.transform.flip(self.original_surface, True, False)
-            #self.surface = pygame.transform.flip(self.original_surface, True, False)
-
-        # Flip the interactive surfaces along with the base surface
-        if self.scaled_hover_surface:
-            self.scaled_hover_surface = pygame.transform.flip(self.scaled_hover_surface, True, False)
-        else:
-            self.hover_surface = pygame.transform.flip(self.hover_surface, True, False)
-
-        if self.scaled_clicked_surface:
-            self.scaled_clicked_surface = pygame.transform.flip(self.scaled_clicked_surface, True, False)
-        else:
-            self.clicked_surface = pygame.transform.flip(self.clicked_surface, True, False)
+        settings.scene.Invalidate(self)
@@ -0,0 +1,97 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import time
+import pygame
+from HBEngine.Core import settings, action_manager, profiler, surface_cache, font_cache
+from HBEngine.Core.Objects.renderable import Renderable
+
+
+class PerfHUD(Renderable):
+    """
+    A debug overlay showing the frame rate, a graph of recent frame times, the time spent in each phase of the frame,
+    and counts of what the engine is currently handling. Drawn above everything else, including the pause menu
+
+    The HUD relies on the profiler, which should be enabled for as long as the HUD is shown
+    """
+    KEY = "!&HBENGINE_INTERNAL_PERF_HUD!&"
+    FONT = "HBEngine/Content/Fonts/Comfortaa/Comfortaa-Regular.ttf"
+    REFRESH_INTERVAL = 0.1  # In seconds
+
+    MIN_WIDTH = 300
+    PADDING = 6
+    GRAPH_HEIGHT = 50
+    GRAPH_FRAMES = 150
+    GRAPH_MAX = 1000 / 30  # The frame time shown at the top of the graph, in milliseconds
+    BUDGET = 1000 / 60  # The frame time budget line drawn across the graph, in milliseconds
+
+    def __init__(self):
+        super().__init__({"key": self.KEY, "z_order": 100000000000, "center_align": False})
+
+        self.font_obj = font_cache.Load(settings.ConvertPartialToAbsolutePath(self.FONT), 13)
+        self.last_refresh = 0
+        self.last_draw_counts = {}  # Frames without a draw don't report any blits, so keep the counts from the last draw
+
+    def Refresh(self):
+        """ Redraws the HUD with the latest profiler data. Redraws are throttled so the HUD stays cheap to show """
+        now = time.perf_counter()
+        if now - self.last_refresh < self.REFRESH_INTERVAL or not profiler.history:
+            return
+        self.last_refresh = now
+
+        frame_times = [frame_time * 1000 for frame_time, phases in profiler.history]
+        recent_times = frame_times[-self.GRAPH_FRAMES:]
+        phases = profiler.history[-1][1]
+        if "blits" in profiler.last_frame_counts:
+            self.last_draw_counts = profiler.last_frame_counts
+
+        lines = [
+            f"FPS: {settings.clock.get_fps():.1f}   Frame: {recent_times[-1]:.2f} ms   Max: {max(recent_times):.2f} ms",
+            "   ".join(f"{phase}: {phases[phase] * 1000:.2f}" for phase in profiler.PHASES[:3]),
+            "   ".join(f"{phase}: {phases[phase] * 1000:.2f}" for phase in profiler.PHASES[3:]),
+            f"Actions: {len(action_manager.active_actions)}   "
+            f"Renderables: {len(settings.scene.active_renderables.GetDrawList())}   "
+            f"Blits: {self.last_draw_counts.get('blits', 0)} ({self.last_draw_counts.get('blit_calls', 0)} calls)",
+            f"Cached Surfaces: {surface_cache.GetStats()['entries']}   Fonts: {font_cache.GetStats()['fonts']}"
+        ]
+        text_surfaces = [self.font_obj.render(line, True, (255, 255, 255)) for line in lines]
+
+        # Background panel
+        line_height = self.font_obj.get_linesize()
+        width = max(self.MIN_WIDTH, max(text_surface.get_width() for text_surface in text_surfaces) + self.PADDING * 2)
+        height = self.PADDING * 3 + line_height * len(lines) + self.GRAPH_HEIGHT
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+
+        top = self.PADDING
+        for text_surface in text_surfaces:
+            surface.blit(text_surface, (self.PADDING, top))
+            top += line_height
+
+        # Frame time graph. Each frame is a bar, with frames over budget highlighted
+        graph_rect = pygame.Rect(self.PADDING, top + self.PADDING, width - self.PADDING * 2, self.GRAPH_HEIGHT)
+        bar_width = graph_rect.width / self.GRAPH_FRAMES
+        for index, frame_time in enumerate(recent_times):
+            bar_height = min(frame_time / self.GRAPH_MAX, 1) * graph_rect.height
+            pygame.draw.rect(
+                surface,
+                (230, 80, 80) if frame_time > self.BUDGET else (80, 200, 120),
+                (graph_rect.x + index * bar_width, graph_rect.bottom - bar_height, max(bar_width, 1), max(bar_height, 1))
+            )
+        budget_y = graph_rect.bottom - (self.BUDGET / self.GRAPH_MAX) * graph_rect.height
+        pygame.draw.line(surface, (255, 255, 255), (graph_rect.x, budget_y), (graph_rect.right, budget_y))
+
+        self.surface = surface
+        self.rect = pygame.Rect(0, 0, *surface.get_size())
+        settings.scene.Invalidate(self)
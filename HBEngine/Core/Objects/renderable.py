@@ -15,7 +15,14 @@
 from __future__ import annotations
 from typing import Union
 import pygame
-from HBEngine.Core import settings
+import weakref
+from HBEngine.Core import settings, surface_cache
+from HBEngine.Core.Objects.renderable_group import RenderableChildren, MarkTreeChanged
+
+
+# Flipped and tinted variants of surfaces, memoized per source surface. Structure: {<surface>: {<variant_key>: <surface>}}
+surface_variants = weakref.WeakKeyDictionary()
+MAX_VARIANTS = 16  # Per source surface
 
 
 class Renderable(pygame.sprite.Sprite):
@@ -31,7 +38,7 @@ class Renderable(pygame.sprite.Sprite):
     def __init__(self, renderable_data: dict, parent: Renderable = None):
         super().__init__()
         self.parent = parent
-        self.children = []
+        self.children = RenderableChildren()  # Kept sorted by z-order
 
         self.connected = False  # Control whether state is determined by an external source
 
@@ -40,17 +47,42 @@ class Renderable(pygame.sprite.Sprite):
         self.surface = pygame.Surface((0, 0), pygame.SRCALPHA)  # The active surface
         self.scaled_surface = None  # The active surface used in resolutions different from the main resolution
 
+        # Render state. These are applied when drawing instead of being baked into the surfaces, allowing surfaces to
+        # be shared between renderables
+        self.alpha = 255
+        self.flip_x = False
+        self.tint = None  # An RGB(A) color multiplied into the surface
+        self.scale = 1.0  # The size the surface is drawn at relative to its actual size, around its center
+        self.scaled_variant = None  # The last scaled surface. Structure: (<source_surface>, <scale>, <surface>)
+
+        # The screen area this renderable covered when it was last drawn, and the state it was drawn with. The scene
+        # compares these against the current state to determine which regions of the screen need repainting
+        self.drawn_rect = None
+        self.drawn_state = None
+
         # YAML Parameters
         self.renderable_data = renderable_data
         self.position = (0, 0) if "position" not in self.renderable_data else self.renderable_data['position']
         self.center_align = True if "center_align" not in self.renderable_data else self.renderable_data['center_align']
-        self.z_order = 0 if "z_order" not in self.renderable_data else self.renderable_data['z_order']
+        self._z_order = 0 if "z_order" not in self.renderable_data else self.renderable_data['z_order']
+        self.static = False if "static" not in self.renderable_data else self.renderable_data['static']  # See 'Scene.Draw'
 
         # For indentification in the rendering stack, all renderables require a unique identifier
         if 'key' not in self.renderable_data:
             raise ValueError(f"No key assigned to {self}. The 'key' property is mandatory for all renderables")
         self.key = self.renderable_data['key']
 
+    @property
+    def z_order(self) -> int:
+        return self._z_order
+
+    @z_order.setter
+    def z_order(self, value: int):
+        # Any list this renderable is in is sorted by z-order, so they'll need to be resorted
+        if value != self._z_order:
+            self._z_order = value
+            MarkTreeChanged(reordered=True)
+
     def RecalculateSize(self, multiplier):
         """ Resize the renderable and its surfaces based on the provided size multiplier """
 
@@ -109,6 +141,106 @@ class Renderable(pygame.sprite.Sprite):
         else:
             return self.surface
 
+    def GetDirtyRects(self) -> list:
+        """
+        Returns the screen regions this renderable has touched since it was last drawn: the area it previously
+        covered, and the area it covers now. Returns an empty list if nothing about its appearance has changed
+        """
+        surface = self.GetRenderSurface()
+        draw_state = (self.visible, surface, self.alpha, self.rect.x, self.rect.y)
+        if draw_state == self.drawn_state:
+            return []
+
+        dirty_rects = []
+        if self.drawn_rect:
+            dirty_rects.append(self.drawn_rect)
+
+        new_rect = None
+        if self.visible:
+            new_rect = self.GetRenderRect(surface)
+            if new_rect.w > 0 and new_rect.h > 0:
+                dirty_rects.append(new_rect)
+            else:
+                new_rect = None
+
+        self.drawn_rect = new_rect
+        self.drawn_state = draw_state
+        return dirty_rects
+
+    def GetRenderRect(self, surface: pygame.Surface) -> pygame.Rect:
+        """
+        Returns the screen region the provided render surface (See 'GetRenderSurface') is drawn to. Blits are positioned
+        using the rect, but cover the full size of the surface. Scaled surfaces are centered on the rect
+        """
+        if self.scale == 1:
+            return surface.get_rect(topleft=(self.rect.x, self.rect.y))
+
+        return surface.get_rect(center=self.rect.center)
+
+    def MarkDirty(self):
+        """ Force this renderable to be repainted on the next draw, even if its draw state appears unchanged """
+        self.drawn_state = None
+
+    def ClearDrawnState(self):
+        """ Forget where this renderable was last drawn. Used when it leaves the render stack """
+        self.drawn_rect = None
+        self.drawn_state = None
+
+    def GetRenderSurface(self) -> pygame.Surface:
+        """
+        Return the active surface with this renderable's flip, tint and scale applied. Flipped and tinted variants are
+        memoized per source surface, so renderables sharing a surface also share its variants. Scale usually changes
+        every frame while it's animated, so only the last scaled surface is kept, per renderable. Alpha isn't included,
+        as that is applied while blitting
+        """
+        surface = self.GetSurface()
+        if self.flip_x or self.tint:
+            surface = self.GetVariant(surface)
+        if self.scale != 1:
+            surface = self.GetScaledVariant(surface)
+
+        return surface
+
+    def GetVariant(self, surface: pygame.Surface) -> pygame.Surface:
+        """ Returns the provided surface with this renderable's flip and tint applied """
+        variant_key = (self.flip_x, tuple(self.tint) if self.tint else None)
+        variants = surface_variants.setdefault(surface, {})
+        if variant_key not in variants:
+            # Animated tints create a new variant every frame, so don't let them accumulate
+            if len(variants) >= MAX_VARIANTS:
+                variants.clear()
+
+            variant = surface
+            if self.flip_x:
+                variant = pygame.transform.flip(variant, True, False)
+            if self.tint:
+                variant = variant.copy() if variant is surface else variant
+                variant.fill(self.tint, special_flags=pygame.BLEND_RGBA_MULT if len(self.tint) == 4 else pygame.BLEND_RGB_MULT)
+            variants[variant_key] = variant
+
+        return variants[variant_key]
+
+    def GetScaledVariant(self, surface: pygame.Surface) -> pygame.Surface:
+        """ Returns the provided surface scaled by this renderable's scale """
+        if self.scaled_variant and self.scaled_variant[0] is surface and self.scaled_variant[1] == self.scale:
+            return self.scaled_variant[2]
+
+        new_size = (max(round(surface.get_width() * self.scale), 0), max(round(surface.get_height() * self.scale), 0))
+        scaled = pygame.transform.smoothscale(surface, new_size)
+        self.scaled_variant = (surface, self.scale, scaled)
+
+        return scaled
+
+    def IsOpaque(self) -> bool:
+        """
+        Returns whether every pixel this renderable draws is fully opaque, hiding anything drawn beneath it. Only
+        surfaces from the surface cache are checked for opacity, so anything else is treated as transparent
+        """
+        if self.alpha < 255 or (self.tint and len(self.tint) == 4 and self.tint[3] < 255):
+            return False
+
+        return surface_cache.IsOpaque(self.GetSurface())
+
     def UpdateRect(self, new_pos: tuple, new_size: tuple):
         """ Updates this renderable's rect position and size using the provided values """
         self.rect.x = new_pos[0]
@@ -135,7 +267,7 @@ class Renderable(pygame.sprite.Sprite):
 
     def ConvertNormToScreen(self, norm_value: tuple) -> tuple:
         """ Take the normalized pos and convert it to absolute screen space coordinates """
-        screen_size = pygame.display.get_surface().get_size()
+        screen_size = settings.window.get_size()
 
         return (
             norm_value[0] * screen_size[0],
@@ -144,7 +276,7 @@ class Renderable(pygame.sprite.Sprite):
 
     def ConvertScreenToNorm(self, screen_val: tuple) -> tuple:
         """ Take the screen space position and normalize it to 0-1 """
-        screen_size = pygame.display.get_surface().get_size()
+        screen_size = settings.window.get_size()
 
         return (
             screen_val[0] / screen_size[0],
@@ -190,10 +322,7 @@ class Renderable(pygame.sprite.Sprite):
     # ***************** TRANSFORM ACTIONS *******************
 
     def Flip(self):
-        """ Flips the sprite horizontally. Chooses between the unscaled and scaled surface """
-        if self.scaled_surface:
-            self.scaled_surface = pygame.transform.flip(self.scaled_surface, True, False)
-        else:
-            self.surface = pygame.transform.flip(self.surface, True, False)
+        """ Flips the renderable horizontally. This applies to all of its surfaces, as it's applied while drawing """
+        self.flip_x = not self.flip_x
 
 
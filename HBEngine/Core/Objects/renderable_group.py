@@ -12,15 +12,92 @@
     You should have received a copy of the GNU General Public License
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
+import bisect
+
+# Incremented whenever the structure of any renderable tree changes (Renderables added or removed). Groups compare
+# against these to determine whether their flattened draw list is stale
+tree_revision = 0
+
+# Incremented whenever any renderable's z-order changes, as existing lists need to be re-sorted in addition to
+# being re-flattened
+order_revision = 0
+
+
+def MarkTreeChanged(reordered: bool = False):
+    """ Inform all groups that a renderable tree has changed, and that their draw lists need to be rebuilt """
+    global tree_revision
+    global order_revision
+
+    tree_revision += 1
+    if reordered:
+        order_revision += 1
+
+
+def GetZOrder(renderable) -> int:
+    return renderable.z_order
+
+
+class RenderableChildren(list):
+    """
+    A list of child renderables that keeps itself sorted by z-order (Lowest to Highest). Renderables with matching
+    z-orders are kept in insertion order. Any change to the list marks the renderable tree as changed
+    """
+    def append(self, renderable):
+        super().insert(bisect.bisect_right(self, renderable.z_order, key=GetZOrder), renderable)
+        MarkTreeChanged()
+
+    def insert(self, index, renderable):
+        """ Override: The position is determined by z-order, so the provided index is ignored """
+        self.append(renderable)
+
+    def extend(self, renderables):
+        for renderable in renderables:
+            self.append(renderable)
+
+    def __iadd__(self, renderables):
+        self.extend(renderables)
+        return self
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.sort(key=GetZOrder)
+        MarkTreeChanged()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        MarkTreeChanged()
+
+    def remove(self, renderable):
+        super().remove(renderable)
+        MarkTreeChanged()
+
+    def pop(self, index=-1):
+        renderable = super().pop(index)
+        MarkTreeChanged()
+        return renderable
+
+    def clear(self):
+        super().clear()
+        MarkTreeChanged()
 
 
 class RenderableGroup:
     def __init__(self):
         """
         This class mimics the base pygame sprite group class, but uses a dictionary for the renderable list.
-        The 'key' value in each renderable is used as the dictionary key
+        The 'key' value in each renderable is used as the dictionary key.
+
+        The group also retains its renderables in draw order so drawing never needs to sort. 'draw_order' contains
+        the top-level renderables sorted by z-order, and is updated as renderables are added and removed. 'draw_list'
+        is a flattened tuple of every renderable including children, and is only rebuilt when a renderable tree changes
         """
         self.renderables = {}
+        self.draw_order = []
+        self.draw_list = ()
+
+        # The revisions 'draw_list' was built against. See 'MarkTreeChanged'
+        self.tree_revision = -1
+        self.order_revision = order_revision
 
         super().__init__()
 
@@ -32,7 +109,15 @@ class RenderableGroup:
         for renderable in r_to_add:
             if renderable.key is None:
                 print(f"Renderable has no key assigned - Removal will be impossible: {renderable}")
+
+            # Replace any renderable already using this key
+            if renderable.key in self.renderables:
+                self.draw_order.remove(self.renderables[renderable.key])
+
             self.renderables[renderable.key] = renderable
+            bisect.insort_right(self.draw_order, renderable, key=GetZOrder)
+
+        MarkTreeChanged()
 
     def Remove(self, *key_to_remove) -> bool:
         """
@@ -41,7 +126,8 @@ class RenderableGroup:
         """
         for key in key_to_remove:
             try:
-                del self.renderables[key]
+                self.draw_order.remove(self.renderables.pop(key))
+                MarkTreeChanged()
                 return True
             except KeyError as exc:
                 print(f"Key not found: {exc}")
@@ -52,14 +138,48 @@ class RenderableGroup:
 
     def Clear(self):
         self.renderables.clear()
+        self.draw_order.clear()
+        MarkTreeChanged()
 
     def Exists(self, key) -> bool:
         """ Returns a boolean for whether the provided key exists in the renderables list """
         return key in self.renderables
 
     def Get(self) -> list:
-        """ Returns the list of renderables inside this group"""
-        return list(self.renderables.values())
+        """
+        Returns the list of top-level renderables inside this group, sorted by z-order. This is the group's own list, so
+        it must not be modified
+        """
+        return self.draw_order
+
+    def GetDrawList(self) -> tuple:
+        """
+        Returns every renderable in this group in the order they're drawn, including children. Each renderable is
+        followed by its own children. The tuple is only rebuilt when a renderable tree changes, so it's safe to iterate
+        even if the tree is changed while doing so
+        """
+        if self.tree_revision != tree_revision:
+            # A z-order change somewhere means any of our lists may be out of order. Sorting an already sorted list
+            # is cheap, so resort everything while flattening
+            resort = self.order_revision != order_revision
+            if resort:
+                self.draw_order.sort(key=GetZOrder)
+
+            draw_list = []
+            self._Flatten(self.draw_order, draw_list, resort)
+            self.draw_list = tuple(draw_list)
+            self.tree_revision = tree_revision
+            self.order_revision = order_revision
+
+        return self.draw_list
+
+    def _Flatten(self, renderables: list, draw_list: list, resort: bool):
+        for renderable in renderables:
+            draw_list.append(renderable)
+            if renderable.children:
+                if resort:
+                    renderable.children.sort(key=GetZOrder)
+                self._Flatten(renderable.children, draw_list, resort)
 
     def GetFromKey(self, key: str):
         """ Returns the renderable that matches the given key. Returns 'None' if there is no matching renderable """
@@ -67,12 +187,3 @@ class RenderableGroup:
             return self.renderables[key]
         else:
             return None
-
-    def Update(self, target: list = None):
-        if not target:
-            target = list(self.renderables.values())
-        #@TODO: Is there a safer way of parsing these lists that avoid issues with size changing?
-        for renderable in target:
-            renderable.update()
-            if renderable.children:
-                self.Update(renderable.children)
@@ -13,7 +13,7 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import pygame
-from HBEngine.Core import settings
+from HBEngine.Core import settings, surface_cache
 from HBEngine.Core.Objects.renderable import Renderable
 
 
@@ -34,7 +34,7 @@ class SpriteRenderable(Renderable):
                 sprite = settings.ConvertPartialToAbsolutePath(self.renderable_data['sprite'])
 
                 try:
-                    self.surface = pygame.image.load(sprite).convert_alpha()
+                    self.surface = surface_cache.Load(sprite, self)
                     self.rect = self.surface.get_rect()
                 except Exception as exc:
                     raise ValueError(f"Failed to load sprite: '{sprite}' - Either the file was not found, or it is not a "
@@ -45,4 +45,10 @@ class SpriteRenderable(Renderable):
                 if initial_rescale:
                     self.RecalculateSize(settings.resolution_multiplier)
 
+    def GetRescaledSurface(self, surface: pygame.Surface, multiplier: float) -> pygame.Surface:
+        """ Override: Rescale cached surfaces through the surface cache so they're shared between instances as well """
+        path = surface_cache.GetPath(surface)
+        if path:
+            return surface_cache.Load(path, self, multiplier)
 
+        return super().GetRescaledSurface(surface, multiplier)
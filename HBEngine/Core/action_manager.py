@@ -12,16 +12,35 @@
     You should have received a copy of the GNU General Public License
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
-import inspect, operator
+import time
+import operator
 from typing import Type
 from HBEngine.Core.Actions import actions, transitions
-from HBEngine.Core import settings
+from HBEngine.Core import settings, profiler, action_stats, tracer, tween
 
 
 active_actions = {}
 
+# Every action and transition available by name. These are populated with the engine's own actions and transitions on
+# the first lookup (See 'RegisterBuiltins'), and can be extended with additional ones using 'RegisterAction' and
+# 'RegisterTransition'
+#
+# Structure: {<name>: <class>}
+registered_actions = {}
+registered_transitions = {}
+builtins_registered = False
+
 
 def Update(events):
+    if profiler.enabled:
+        start_time = time.perf_counter()
+        UpdateActions(events)
+        profiler.AddNested("actions", time.perf_counter() - start_time)
+    else:
+        UpdateActions(events)
+
+
+def UpdateActions(events):
     global active_actions
     pending_completion = []
     if active_actions:
@@ -30,21 +49,43 @@ def Update(events):
         for action, null_val in active_actions.items():
             if action.complete is True:
                 pending_completion.append(action)
+            elif action_stats.enabled or tracer.enabled:
+                start_time = time.perf_counter()
+                action.Update(events)
+                end_time = time.perf_counter()
+                if action_stats.enabled:
+                    action_stats.RecordUpdate(action, end_time - start_time)
+                if tracer.enabled:
+                    tracer.AddSpan(f"{type(action).__name__}.Update", "actions", start_time, end_time)
             else:
                 action.Update(events)
-        if pending_completion:
-            for action in pending_completion:
-                # We defer using completion delegates to here since, if actions could execute them, it might
-                # cause them to close prematurely. It's also difficult to have oversight on what actions might
-                # do, and what completion delegates may do. To avoid any confusion, always run the delegates just
-                # as the action is closing
-                if action.completion_callback:
+
+    # Tweens are advanced after the actions driving them, and before any completion callbacks so tweens played by those
+    # start on the next frame. This keeps tweens in step with the actions that wait on them
+    tween.Update(settings.scene.delta_time)
+
+    if pending_completion:
+        for action in pending_completion:
+            # We defer using completion delegates to here since, if actions could execute them, it might
+            # cause them to close prematurely. It's also difficult to have oversight on what actions might
+            # do, and what completion delegates may do. To avoid any confusion, always run the delegates just
+            # as the action is closing.
+            #
+            # While the scene is being replaced, completion callbacks are skipped, as they'd only start new work in the
+            # outgoing scene (IE. The next line of dialogue). The new scene starts its own actions once it's loaded
+            if not settings.pending_scene:
+                if action_stats.enabled:
+                    start_time = time.perf_counter()
+                    if action.completion_callback:
+                        action.completion_callback()
+                    action_stats.RecordCompletion(action, time.perf_counter() - start_time)
+                elif action.completion_callback:
                     action.completion_callback()
 
-                # Do one final confirmation that the action still exists in case the completion callback lead to the
-                # deletion of the action in question (Commonly happens during scene changes)
-                if action in active_actions:
-                    del active_actions[action]
+            # Do one final confirmation that the action still exists in case the completion callback lead to the
+            # deletion of the action in question (Commonly happens during scene changes)
+            if action in active_actions:
+                del active_actions[action]
 
 
 def Clear():
@@ -57,6 +98,9 @@ def PerformAction(action_data: dict, action_name: str, parent: object = None, co
     """
     Given an action_data YAML block and an action name, create and run the associated action. Return anything
     that the action opts to return
+
+    Note: 'completion_callback' isn't called if the action completes while a scene switch is pending, as the scene it
+    was started in is being replaced (See 'UpdateActions')
     """
     # Check conditions prior to loading the action
     if "conditions" in action_data:
@@ -68,6 +112,10 @@ def PerformAction(action_data: dict, action_name: str, parent: object = None, co
 
 
 
+    timed = action_stats.enabled or tracer.enabled
+    if timed:
+        creation_start = time.perf_counter()
+
     # Fetch the action function corresponding to the next action index
     action = GetAction(action_name)
     new_action = action(
@@ -83,56 +131,114 @@ def PerformAction(action_data: dict, action_name: str, parent: object = None, co
     active_actions[new_action] = None
 
     # Actions can opt in to return data. Return whatever is returned from the underlying action
+    if timed:
+        start_begin = time.perf_counter()
+        result = new_action.Start()
+        start_end = time.perf_counter()
+        if action_stats.enabled:
+            action_stats.RecordStart(new_action, start_begin - creation_start, start_end - start_begin)
+        if tracer.enabled:
+            tracer.AddSpan(f"{action_name}.Start", "actions", start_begin, start_end)
+        return result
+
     return new_action.Start()
 
 
 def GetAction(action_name: str) -> callable:
     """
-    Returns the action class with a matching name to the provided name. Returns 'None' if the action isn't found
+    Returns the action class with a matching name to the provided name. Raises a 'ValueError' if the action isn't found
     """
-    # Get a list of the action objects in the form of a list of tuples (object_name, object),
-    # and use the given action text as a lookup for an action in the list. If found, return it, otherwise
-    # return None
-    available_actions = inspect.getmembers(actions, inspect.isclass)
-
-    #@TODO: Review how to speed this up, as it seems inefficient
-    for action, object_ref in available_actions:
-        if action_name == action:
-            return object_ref
+    if not builtins_registered:
+        RegisterBuiltins()
 
-    print(f"The provided action name is invalid: '{action_name}'. Please review the available actions, or "
-          "add a new action function for the one provided")
+    if action_name not in registered_actions:
+        raise ValueError(f"The provided action name is invalid: '{action_name}'. Please review the available actions, or "
+                         "register a new action for the one provided")
 
-    return None
+    return registered_actions[action_name]
 
 
 def GetTransition(transition_data: dict) -> callable:
     """
     Returns the object associated with the provided transition text
     """
-    if 'type' in transition_data:
-        transition = None
+    if not builtins_registered:
+        RegisterBuiltins()
 
+    if 'type' in transition_data:
         # No transition specified
         if transition_data['type'] == 'None':
             return None
 
-        available_transitions = inspect.getmembers(transitions, inspect.isclass)
-        for transition, t_object in available_transitions:
-            if transition_data['type'] == transition:
-                transition = t_object
-                break
-
-        if transition is None:
+        if transition_data['type'] not in registered_transitions:
             raise ValueError("The provided transition name is invalid. Please review the available transitions, "
-                             "or add a new action object for the one provided")
-            return None
+                             "or register a new transition for the one provided")
 
-        return transition
+        return registered_transitions[transition_data['type']]
     else:
         raise ValueError("No transition type specified - Unable to process transition")
 
 
+def RegisterAction(action_class: Type['actions.Action'] = None, name: str = None):
+    """
+    Makes the provided action class available under its class name, or under 'name' if provided. Any existing action
+    with the same name is replaced. Can also be used as a decorator:
+
+        @action_manager.RegisterAction
+        class my_action(actions.Action):
+            ...
+    """
+    def Register(cls):
+        registered_actions[name or cls.__name__] = cls
+        return cls
+
+    if action_class is None:
+        return Register
+
+    return Register(action_class)
+
+
+def RegisterTransition(transition_class: Type['transitions.Transition'] = None, name: str = None):
+    """
+    Makes the provided transition class available under its class name, or under 'name' if provided. Any existing
+    transition with the same name is replaced. Can also be used as a decorator (See 'RegisterAction')
+    """
+    def Register(cls):
+        registered_transitions[name or cls.__name__] = cls
+        return cls
+
+    if transition_class is None:
+        return Register
+
+    return Register(transition_class)
+
+
+def RegisterBuiltins():
+    """
+    Registers the engine's own actions and transitions. This is deferred until the first lookup, as 'actions' and
+    this module import each other, so the action classes may not exist yet when this module is imported. Anything
+    already registered under the same name is kept, so registrations made before the first lookup still take priority
+    """
+    global builtins_registered
+    builtins_registered = True
+
+    for registry, base in ((registered_actions, actions.Action), (registered_transitions, transitions.Transition)):
+        registered_classes = set(registry.values())
+        for cls in GetSubclasses(base):
+            if cls not in registered_classes:
+                registry.setdefault(cls.__name__, cls)
+
+
+def GetSubclasses(base: type) -> list:
+    """ Returns every class that inherits from the provided class, whether directly or indirectly """
+    subclasses = []
+    for subclass in base.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(GetSubclasses(subclass))
+
+    return subclasses
+
+
 def CreateTransition(transition_data: dict, renderable):
     transition = GetTransition(transition_data)
 
@@ -180,4 +286,3 @@ def CheckCondition(conditional_data: dict) -> bool:
             break
 
     return condition_met
-
@@ -0,0 +1,144 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import csv
+import json
+import weakref
+from HBEngine.Core import settings
+
+"""
+Timing and lifecycle statistics for actions, grouped by action name. The action manager reports each action as it's
+created, started, updated and completed, and the results are totalled here:
+    - count:            How many times the action was performed
+    - create_time:      Time spent constructing the action (Including validating its action data)
+    - start_time:       Time spent in 'Start'
+    - update_time:      Time spent in 'Update', across every update of every instance
+    - updates:          How many times the action was updated
+    - completed:        How many instances ran to completion. Actions cleared by a scene change never complete
+    - lifetime_frames:  Frames between an action starting and completing, across every completed instance
+    - callback_time:    Time spent in completion callbacks
+
+Times are inclusive, so actions that perform other actions (IE. 'start_dialogue') include the time spent in those as
+well.
+
+Stats are disabled by default. The action manager checks 'enabled' first, so there is no cost when they're off. All
+times are recorded in seconds, and reported in milliseconds
+"""
+
+FIELDS = ("count", "create_time", "start_time", "update_time", "updates", "completed", "lifetime_frames", "callback_time")
+
+enabled = False
+
+# Structure: {<action_name>: {<field>: <value>}}
+stats = {}
+
+# The frame each active action was started on. Structure: {<action>: <frame>}
+start_frames = weakref.WeakKeyDictionary()
+
+
+def Enable():
+    global enabled
+
+    enabled = True
+
+
+def Disable():
+    global enabled
+
+    enabled = False
+
+
+def Clear():
+    """ Discards all recorded stats """
+    stats.clear()
+    start_frames.clear()
+
+
+def RecordStart(action: object, create_time: float, start_time: float):
+    """ Records a newly performed action, and how long it took to create and start """
+    action_stats = GetEntry(action)
+    action_stats["count"] += 1
+    action_stats["create_time"] += create_time
+    action_stats["start_time"] += start_time
+    start_frames[action] = settings.frame_count
+
+
+def RecordUpdate(action: object, update_time: float):
+    action_stats = GetEntry(action)
+    action_stats["updates"] += 1
+    action_stats["update_time"] += update_time
+
+
+def RecordCompletion(action: object, callback_time: float):
+    """ Records a completed action, and how long its completion callback took """
+    action_stats = GetEntry(action)
+    action_stats["completed"] += 1
+    action_stats["callback_time"] += callback_time
+
+    # Actions started before stats were enabled don't have a start frame, so their lifetime is unknown
+    if action in start_frames:
+        action_stats["lifetime_frames"] += settings.frame_count - start_frames.pop(action)
+
+
+def GetEntry(action: object) -> dict:
+    """ Returns the stats for the provided action's type, creating them if this is the first of its type """
+    action_name = type(action).__name__
+    if action_name not in stats:
+        stats[action_name] = dict.fromkeys(FIELDS, 0)
+
+    return stats[action_name]
+
+
+def GetStats() -> dict:
+    """
+    Returns the recorded stats for each action, sorted from the most to the least total time spent. Each entry also
+    includes the average per instance (Or per completed instance, for lifetimes and callbacks). Times are in milliseconds
+    """
+    report = {}
+    for action_name, action_stats in stats.items():
+        count = action_stats["count"] or 1
+        completed = action_stats["completed"] or 1
+        report[action_name] = {
+            "count": action_stats["count"],
+            "total_time": (action_stats["create_time"] + action_stats["start_time"] + action_stats["update_time"] +
+                           action_stats["callback_time"]) * 1000,
+            "create_time": action_stats["create_time"] * 1000,
+            "mean_create_time": action_stats["create_time"] * 1000 / count,
+            "start_time": action_stats["start_time"] * 1000,
+            "mean_start_time": action_stats["start_time"] * 1000 / count,
+            "update_time": action_stats["update_time"] * 1000,
+            "mean_update_time": action_stats["update_time"] * 1000 / count,
+            "updates": action_stats["updates"],
+            "completed": action_stats["completed"],
+            "mean_lifetime_frames": action_stats["lifetime_frames"] / completed,
+            "callback_time": action_stats["callback_time"] * 1000,
+            "mean_callback_time": action_stats["callback_time"] * 1000 / completed
+        }
+
+    return dict(sorted(report.items(), key=lambda item: item[1]["total_time"], reverse=True))
+
+
+def Dump(file_path: str):
+    """ Writes the current stats to the provided file. Files ending in '.csv' are written as CSV, otherwise as JSON """
+    report = GetStats()
+
+    with open(file_path, "w", newline="") as f:
+        if file_path.lower().endswith(".csv"):
+            writer = csv.writer(f)
+            columns = next(iter(report.values())).keys() if report else ()
+            writer.writerow(("action", *columns))
+            for action_name, action_stats in report.items():
+                writer.writerow((action_name, *action_stats.values()))
+        else:
+            json.dump(report, f, indent=4)
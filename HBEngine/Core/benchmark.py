@@ -0,0 +1,123 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import pygame
+from HBEngine.Core import profiler, action_stats, surface_cache, font_cache, sound_cache, text_layout
+from Tools.HBYaml.hb_yaml import Reader
+from Tools.HBYaml import compiled_cache
+
+"""
+Headless benchmarking. Runs a scene for a fixed number of frames without a window or audio device, optionally driven by
+a script of input events, and reports how long each frame took and where that time went.
+
+Every frame uses the same delta time, and the frame rate is uncapped, so runs are repeatable and comparable between
+changes. Input scripts are HBYaml files containing a list of events, each triggered at the start of a given frame:
+
+- frame: 30
+  type: mouse_move      # Moves the mouse to 'pos'
+  pos: [384, 691]
+- frame: 40
+  type: mouse_down      # Presses the left mouse button, at 'pos' if provided, otherwise at the current position
+- frame: 45
+  type: mouse_up        # Releases the left mouse button, at 'pos' if provided, otherwise at the current position
+- frame: 60
+  type: key             # Presses and releases 'key' (Any name understood by 'pygame.key.key_code')
+  key: space
+"""
+
+
+def Run(project_path: str, scene_file: str, frames: int, input_file: str = None, output_file: str = None,
+        fixed_delta: float = 1 / 60) -> dict:
+    """
+    Benchmarks the provided scene for the provided number of frames, returning a report of the results. If
+    'output_file' is provided, the report is also written there as JSON
+    """
+    from HBEngine import hb_engine
+
+    # Run without a window or audio device
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    hb_engine.Initialize(project_path)
+
+    script = {}
+    if input_file:
+        for event_data in Reader.ReadAll(input_file) or []:
+            script.setdefault(event_data["frame"], []).append(event_data)
+
+    mouse_pos = [(0, 0)]
+
+    def PostInput(frame: int):
+        for event_data in script.get(frame, []):
+            PostEvent(event_data, mouse_pos)
+
+        # End the run once the final frame has been reached
+        if frame == frames - 1:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    profiler.Clear()
+    profiler.Enable(history_size=frames)
+    hb_engine.Main(starting_scene=scene_file, frame_callback=PostInput, fixed_delta=fixed_delta)
+    profiler.Disable()
+
+    report = {
+        "scene": scene_file,
+        "fixed_delta": fixed_delta,
+        **profiler.GetSummary(),
+        "peak_rss": profiler.GetPeakMemory(),
+        "caches": {
+            "surfaces": surface_cache.GetStats(),
+            "fonts": font_cache.GetStats(),
+            "sounds": sound_cache.GetStats(),
+            "text_layouts": text_layout.GetStats(),
+            "yaml": Reader.GetStats(),
+            "compiled_yaml": compiled_cache.GetStats()
+        }
+    }
+
+    if action_stats.enabled:
+        report["actions"] = action_stats.GetStats()
+
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(report, f, indent=4)
+
+    return report
+
+
+def PostEvent(event_data: dict, mouse_pos: list):
+    """ Posts the pygame events for the provided scripted input event. 'mouse_pos' tracks the current mouse position """
+    event_type = event_data["type"]
+    if "pos" in event_data:
+        pos = tuple(event_data["pos"])
+        rel = (pos[0] - mouse_pos[0][0], pos[1] - mouse_pos[0][1])
+        mouse_pos[0] = pos
+    else:
+        pos = mouse_pos[0]
+        rel = (0, 0)
+
+    if event_type == "mouse_move":
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=rel, buttons=(0, 0, 0)))
+    elif event_type == "mouse_down":
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+    elif event_type == "mouse_up":
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+    elif event_type == "key":
+        key = pygame.key.key_code(event_data["key"])
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0, unicode="", scancode=0))
+    else:
+        raise ValueError(f"Unknown input event type '{event_type}' in the benchmark input script")
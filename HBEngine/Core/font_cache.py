@@ -0,0 +1,83 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import OrderedDict
+import pygame
+from HBEngine.Core.surface_cache import ResolvePath
+
+"""
+An engine-wide cache of loaded fonts, keyed by resolved file path and text size. Opening a font reads and parses the
+font file from disk, so text elements that use the same font and size share a single font object instead.
+
+Fonts aren't modified when rendering, so sharing them is always safe. The cache holds a limited number of fonts, evicting
+the least recently used one when full. Anything still using an evicted font keeps it alive on its own
+"""
+
+max_fonts = 32
+
+# Structure: {(<resolved_path>, <size>): <Font>}. Ordered from least to most recently used
+fonts = OrderedDict()
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0
+}
+
+
+def Load(path: str, size: int) -> pygame.font.Font:
+    """ Returns the font for the provided path and size, loading it if it isn't already cached """
+    key = GetKey(path, size)
+    font = fonts.get(key)
+
+    if font:
+        stats["hits"] += 1
+        fonts.move_to_end(key)
+    else:
+        stats["misses"] += 1
+        font = pygame.font.Font(key[0], size)
+        fonts[key] = font
+        EnforceLimit()
+
+    return font
+
+
+def GetKey(path: str, size: int) -> tuple:
+    """ Returns the key that uniquely identifies the font for the provided path and size """
+    return ResolvePath(path), size
+
+
+def SetLimit(new_limit: int):
+    """ Updates the maximum number of cached fonts, evicting fonts if necessary """
+    global max_fonts
+
+    max_fonts = max(new_limit, 1)
+    EnforceLimit()
+
+
+def EnforceLimit():
+    """ Evict fonts, least recently used first, until the cache is within its size limit """
+    while len(fonts) > max_fonts:
+        fonts.popitem(last=False)
+        stats["evictions"] += 1
+
+
+def Clear():
+    """ Remove all fonts from the cache """
+    fonts.clear()
+
+
+def GetStats() -> dict:
+    """ Returns a copy of the cache statistics, including the current font count """
+    return {**stats, "fonts": len(fonts), "limit": max_fonts}
@@ -0,0 +1,227 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import weakref
+import pygame
+from HBEngine.Core import settings
+from HBEngine.Core.Objects import renderable_group
+
+"""
+Routes mouse input to interactables. Rather than every interactable checking the mouse each frame, the interactables
+that can currently receive input are indexed in a uniform grid by their rects, and hit-testing only happens when the
+mouse moves or a button is pressed or released. Each of these is delivered to the top-most interactable under the
+mouse (The last one drawn) as an enter, leave, press or release (See 'Interactable').
+
+Which interactables can receive input is determined by the renderables provided to 'Update', which are searched along
+with all of their children. This is the scene while playing, the pause interface while paused, and the root of the
+module that owns input while one does.
+
+The index is rebuilt when the renderable trees change, or when an interactable's rect is found to have changed when it's
+next drawn (See 'CheckRect'). Hover is re-tested after each rebuild, so interactables that appear or move under a still
+mouse are still hovered. Interactables can opt in to ignoring the transparent parts of their sprite (See 'GetHitMask')
+"""
+
+CELL_SIZE = 128  # In pixels
+
+# Structure: {(<column>, <row>): [(<draw_index>, <interactable>), ...]}
+grid = {}
+
+# The rect each interactable had when it was indexed. Structure: {<interactable>: <Rect>}
+indexed_rects = {}
+
+# What the index was built from. See 'IsIndexStale'
+index_roots = None
+index_revision = -1
+index_stale = True
+
+hovered = None  # The interactable currently under the mouse
+pressed = None  # The interactable the left mouse button was pressed on, while it's held
+interactions_stopped = False  # Whether interactions were stopped as of the last update
+
+# Hit masks for each surface, built on first use. Structure: {<surface>: <Mask>}
+hit_masks = weakref.WeakKeyDictionary()
+
+
+def Update(events: list, roots: list):
+    """ Delivers this frame's mouse events to the interactables within the provided renderables """
+    global interactions_stopped
+    global hovered
+    global pressed
+
+    if settings.scene.stop_interactions:
+        interactions_stopped = True
+        return
+
+    # Anything that happened to the mouse while interactions were stopped was ignored, so catch up with where it is now.
+    # If the button was released in the meantime, cancel the click
+    if interactions_stopped:
+        interactions_stopped = False
+        if pressed and not settings.mouse_pressed[0]:
+            pressed.OnLeave()
+            if pressed is hovered:
+                hovered = None
+            pressed = None
+        _Hover(settings.mouse_pos)
+
+    if IsIndexStale(roots):
+        BuildIndex(roots)
+        _Hover(settings.mouse_pos)
+
+    for event in events:
+        if event.type == pygame.MOUSEMOTION:
+            _Hover(event.pos)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            _Hover(event.pos)
+            if hovered:
+                pressed = hovered
+                hovered.OnPress()
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            _Hover(event.pos)
+            target = pressed
+            pressed = None
+            if target and target is hovered:
+                target.OnRelease()
+        else:
+            continue
+
+        # Interactions may stop or change what's on screen. Catch up with those changes before handling anything else
+        if settings.scene.stop_interactions:
+            interactions_stopped = True
+            break
+        if IsIndexStale(roots):
+            BuildIndex(roots)
+            _Hover(settings.mouse_pos)
+
+
+def Reset():
+    """ Forgets all interactables. Used when the scene is unloaded """
+    global hovered
+    global pressed
+    global index_roots
+    global index_stale
+    global interactions_stopped
+
+    grid.clear()
+    indexed_rects.clear()
+    hovered = None
+    pressed = None
+    index_roots = None
+    index_stale = True
+    interactions_stopped = False
+
+
+def IsIndexStale(roots: list) -> bool:
+    """ Returns whether the index needs rebuilding before it can be used for the provided renderables """
+    return (
+        index_stale
+        or index_revision != renderable_group.tree_revision
+        or (roots is not index_roots and roots != index_roots)
+    )
+
+
+def MarkStale():
+    """ Requests that the index be rebuilt before the next hit-test """
+    global index_stale
+
+    index_stale = True
+
+
+def CheckRect(interactable):
+    """ Marks the index as stale if the provided interactable's rect has changed since it was indexed """
+    indexed_rect = indexed_rects.get(interactable)
+    if indexed_rect is not None and indexed_rect != interactable.rect:
+        MarkStale()
+
+
+def BuildIndex(roots: list):
+    """ Indexes every interactable within the provided renderables by the grid cells their rects cover """
+    from HBEngine.Core.Objects.interactable import Interactable
+
+    global index_roots
+    global index_revision
+    global index_stale
+
+    grid.clear()
+    indexed_rects.clear()
+
+    # Renderables are visited in draw order, so later entries are drawn above earlier ones
+    pending = list(reversed(roots))
+    draw_index = 0
+    while pending:
+        renderable = pending.pop()
+        if renderable.children:
+            pending.extend(reversed(renderable.children))
+        if not isinstance(renderable, Interactable):
+            continue
+
+        rect = renderable.rect
+        indexed_rects[renderable] = pygame.Rect(rect)
+        if rect.w > 0 and rect.h > 0:
+            for column in range(rect.left // CELL_SIZE, (rect.right - 1) // CELL_SIZE + 1):
+                for row in range(rect.top // CELL_SIZE, (rect.bottom - 1) // CELL_SIZE + 1):
+                    grid.setdefault((column, row), []).append((draw_index, renderable))
+        draw_index += 1
+
+    index_roots = roots
+    index_revision = renderable_group.tree_revision
+    index_stale = False
+
+
+def HitTest(pos: tuple):
+    """ Returns the top-most indexed interactable at the provided screen position, or 'None' if there isn't one """
+    top_index = -1
+    target = None
+    for draw_index, interactable in grid.get((pos[0] // CELL_SIZE, pos[1] // CELL_SIZE), ()):
+        if draw_index > top_index and interactable.rect.collidepoint(pos):
+            if interactable.use_hit_mask and not _MaskContains(interactable, pos):
+                continue
+            top_index = draw_index
+            target = interactable
+
+    return target
+
+
+def GetHitMask(surface: pygame.Surface) -> pygame.mask.Mask:
+    """ Returns a mask of the opaque pixels in the provided surface. Masks are shared between users of a surface """
+    mask = hit_masks.get(surface)
+    if mask is None:
+        mask = pygame.mask.from_surface(surface)
+        hit_masks[surface] = mask
+
+    return mask
+
+
+def _MaskContains(interactable, pos: tuple) -> bool:
+    surface = interactable.GetHitSurface()
+    mask = GetHitMask(surface)
+    render_rect = interactable.GetRenderRect(surface)
+    local_pos = (pos[0] - render_rect.x, pos[1] - render_rect.y)
+    width, height = mask.get_size()
+    if 0 <= local_pos[0] < width and 0 <= local_pos[1] < height:
+        return bool(mask.get_at(local_pos))
+
+    return False
+
+
+def _Hover(pos: tuple):
+    """ Updates which interactable is hovered, delivering leave and enter events if it changed """
+    global hovered
+
+    target = HitTest(pos)
+    if target is not hovered:
+        if hovered:
+            hovered.OnLeave()
+        hovered = target
+        if target:
+            target.OnEnter(target is pressed)
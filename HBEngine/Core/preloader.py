@@ -0,0 +1,229 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import queue
+import threading
+import pygame
+from HBEngine.Core import settings, surface_cache, sound_cache, tracer
+from Tools.HBYaml.hb_yaml import Reader
+
+"""
+Loads scenes ahead of time on a background thread. This includes parsing the scene and interface files, and decoding
+the image and sound files they use, so that switching to the scene only needs to create its renderables.
+
+Preloads are requested either when a scene change is requested (See 'Scene.SwitchScene'), or by scenes listing the
+scenes they're likely to lead to (The 'preload_scenes' scene setting).
+
+Each preload is done in two jobs for the worker thread. The first parses the scene and interface files, and lists the
+assets they use. The main thread removes any that are already cached, then queues the second job to decode the rest.
+
+The worker thread never touches the display or the caches. It hands everything back to the main thread, which
+collects the results once per frame (See 'Update'), converting images for display and storing them in the caches. The
+only engine functions the worker calls are the HBYaml reader, 'settings.ConvertPartialToAbsolutePath' and
+'tracer.AddSpan', which are safe to call from any thread
+"""
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga", ".webp")
+SOUND_EXTENSIONS = (".wav", ".ogg", ".mp3", ".flac")
+
+requested = queue.Queue()  # Jobs waiting for the worker. Structure: (<job_type>, <scene_path>, <data>)
+completed = queue.Queue()  # Results from the worker, waiting to be collected by the main thread
+worker = None
+
+# Structure: {<scene_path>: {"complete": <bool>, "assets_total": <int>, "assets_loaded": <int>, "documents": <list>,
+# "requester": <Scene>}}. 'documents' lists the files parsed for the preload, and 'requester' is the scene that asked
+# for it (See 'Finish')
+preloads = {}
+
+# Files that have been parsed ahead of time, waiting to be read (See 'ReadAll'). Structure: {<file_path>: <data>}
+documents = {}
+
+
+def Preload(partial_file_path: str):
+    """ Starts preloading the provided scene file in the background, if it isn't already """
+    global worker
+
+    scene_path = settings.ConvertPartialToAbsolutePath(partial_file_path)
+    if scene_path in preloads:
+        # Keep the preload for the scene that's now asking for it
+        preloads[scene_path]["requester"] = settings.scene
+        return
+
+    preloads[scene_path] = {
+        "complete": False, "assets_total": 0, "assets_loaded": 0, "documents": [], "requester": settings.scene
+    }
+
+    if not worker:
+        worker = threading.Thread(target=_Work, name="HBEngine Preloader", daemon=True)
+        worker.start()
+
+    requested.put(("parse", scene_path, None))
+
+
+def IsReady(partial_file_path: str) -> bool:
+    """
+    Returns whether the provided scene file has finished preloading. Scenes that were never requested are always
+    considered ready, as they can still be loaded normally
+    """
+    preload = preloads.get(settings.ConvertPartialToAbsolutePath(partial_file_path))
+    return preload is None or preload["complete"]
+
+
+def GetProgress(partial_file_path: str) -> float:
+    """ Returns how far along the preload for the provided scene file is, from 0 to 1 """
+    preload = preloads.get(settings.ConvertPartialToAbsolutePath(partial_file_path))
+    if preload is None or preload["complete"]:
+        return 1.0
+    if not preload["assets_total"]:
+        return 0.0
+
+    return preload["assets_loaded"] / preload["assets_total"]
+
+
+def IsBusy() -> bool:
+    """ Returns whether any scenes are still being preloaded """
+    return any(not preload["complete"] for preload in preloads.values())
+
+
+def Finish(partial_file_path: str):
+    """
+    Stops tracking the preload for the provided scene file. Called once the scene has been loaded.
+
+    Preloads requested by previous scenes are dropped along with any documents that weren't read, as the scenes that
+    would have used them are gone. Preloads requested again by the new scene are kept
+    """
+    preloads.pop(settings.ConvertPartialToAbsolutePath(partial_file_path), None)
+    for scene_path in [path for path, preload in preloads.items() if preload["requester"] is not settings.scene]:
+        del preloads[scene_path]
+
+    kept_documents = {file_path for preload in preloads.values() for file_path in preload["documents"]}
+    for file_path in [file_path for file_path in documents if file_path not in kept_documents]:
+        del documents[file_path]
+
+
+def ReadAll(file_path: str) -> any:
+    """ Returns the contents of the provided file, using the preloaded version if there is one """
+    if file_path in documents:
+        return documents.pop(file_path)
+
+    return Reader.ReadAll(file_path)
+
+
+def Update():
+    """ Collect any results from the worker. Must be called from the main thread """
+    while True:
+        try:
+            result_type, scene_path, data = completed.get_nowait()
+        except queue.Empty:
+            break
+
+        preload = preloads.get(scene_path, {"assets_loaded": 0})
+        if result_type == "documents":
+            # Preloads that were dropped while in progress no longer have anything to read their documents
+            if scene_path in preloads:
+                documents.update(data)
+                preload["documents"].extend(data)
+        elif result_type == "assets":
+            # Only decode what isn't already cached, and sounds only if there's a mixer to play them
+            assets = {
+                asset_path: asset_type for asset_path, asset_type in data.items()
+                if (asset_type == "image" and not surface_cache.Contains(asset_path)) or
+                   (asset_type == "sound" and pygame.mixer.get_init() and not sound_cache.Contains(asset_path))
+            }
+            preload["assets_total"] = len(assets)
+            if assets and scene_path in preloads:
+                requested.put(("decode", scene_path, assets))
+            else:
+                preload["complete"] = True
+        elif result_type == "image":
+            if data[1] is not None:
+                surface_cache.Store(data[0], data[1])
+            preload["assets_loaded"] += 1
+        elif result_type == "sound":
+            if data[1] is not None:
+                sound_cache.Store(data[0], data[1])
+            preload["assets_loaded"] += 1
+        elif result_type == "complete":
+            preload["complete"] = True
+
+
+def _Work():
+    while True:
+        job_type, scene_path, data = requested.get()
+        if job_type == "parse":
+            try:
+                _ParseScene(scene_path)
+            except Exception:
+                # Leave any errors to be raised when the scene is loaded normally, where they can be reported properly
+                completed.put(("complete", scene_path, None))
+        else:
+            _DecodeAssets(scene_path, data)
+            completed.put(("complete", scene_path, None))
+
+
+def _ParseScene(scene_path: str):
+    """ Parses the scene and its interface, and lists the assets they use """
+    scene_documents = {scene_path: Reader.ReadAll(scene_path)}
+
+    interface = scene_documents[scene_path]["settings"].get("interface")
+    if interface and interface != "None":
+        interface_path = settings.ConvertPartialToAbsolutePath(interface)
+        scene_documents[interface_path] = Reader.ReadAll(interface_path)
+
+    assets = {}
+    for data in scene_documents.values():
+        _FindAssets(data, assets)
+
+    completed.put(("documents", scene_path, scene_documents))
+    completed.put(("assets", scene_path, assets))
+
+
+def _DecodeAssets(scene_path: str, assets: dict):
+    for asset_path, asset_type in assets.items():
+        if tracer.enabled:
+            start_time = time.perf_counter()
+        try:
+            if asset_type == "image":
+                asset = pygame.image.load(asset_path)
+            else:
+                asset = pygame.mixer.Sound(asset_path).get_raw()
+        except Exception:
+            # Skip anything that fails to load. It'll be reported when it's loaded normally
+            asset = None
+        if tracer.enabled:
+            tracer.AddSpan(f"Preload {asset_type.capitalize()}", "assets", start_time, time.perf_counter(), {"file": asset_path})
+
+        completed.put((asset_type, scene_path, (asset_path, asset)))
+
+
+def _FindAssets(data: any, assets: dict):
+    """ Recursively search the provided file data for the image and sound files it uses """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            # Music is streamed while playing instead of being decoded ahead of time
+            if key != "music":
+                _FindAssets(value, assets)
+
+    elif isinstance(data, list):
+        for value in data:
+            _FindAssets(value, assets)
+
+    elif isinstance(data, str):
+        extension = os.path.splitext(data)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            assets[settings.ConvertPartialToAbsolutePath(data)] = "image"
+        elif extension in SOUND_EXTENSIONS:
+            assets[settings.ConvertPartialToAbsolutePath(data)] = "sound"
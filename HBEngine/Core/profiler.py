@@ -0,0 +1,187 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import sys
+import math
+import time
+from collections import deque
+
+"""
+Frame timing for the engine's main loop. Each frame is split into phases, and the time spent in each is recorded along
+with the overall frame time.
+
+The main loop marks the end of each phase as it goes (See 'Mark'). Work that can happen in the middle of other phases
+(IE. Actions, which are updated by both the scene and modules) reports its time separately, and is excluded from the
+surrounding phase (See 'AddNested').
+
+Profiling is disabled by default. Every call site checks 'enabled' first, so there is no cost when it's off
+"""
+
+PHASES = ("events", "scene_update", "actions", "modules", "loading", "draw", "present")
+
+enabled = False
+
+# Structure: [(<frame_time>, {<phase>: <seconds>}), ...]. Ordered from oldest to newest frame
+history = deque(maxlen=600)
+
+# Structure: [(<scene_file>, <seconds>), ...]
+scene_loads = []
+
+frame_start = 0.0
+frame_phases = dict.fromkeys(PHASES, 0.0)
+last_mark = 0.0
+nested_time = 0.0  # Time reported through 'AddNested' since the last mark
+
+# Counts of work done during the frame (IE. Blits). Structure: {<name>: <count>}
+frame_counts = {}
+last_frame_counts = {}  # The counts from the most recently completed frame
+
+# Every count, totalled across all frames since the last clear. Structure: {<name>: {"total": <count>, "max": <count>}}
+count_totals = {}
+counted_frames = 0
+
+
+def Enable(history_size: int = 600):
+    """ Enables profiling, keeping the timings for up to 'history_size' of the most recent frames """
+    global enabled
+    global history
+
+    if history.maxlen != history_size:
+        history = deque(history, maxlen=history_size)
+    enabled = True
+
+
+def Disable():
+    global enabled
+
+    enabled = False
+
+
+def Clear():
+    """ Discards all recorded timings """
+    global counted_frames
+
+    history.clear()
+    scene_loads.clear()
+    count_totals.clear()
+    counted_frames = 0
+
+
+def StartFrame():
+    """ Marks the start of a new frame """
+    global frame_start
+    global last_mark
+    global nested_time
+
+    frame_start = last_mark = time.perf_counter()
+    nested_time = 0.0
+    for phase in PHASES:
+        frame_phases[phase] = 0.0
+    frame_counts.clear()
+
+
+def Mark(phase: str):
+    """ Marks the end of the provided phase, attributing all time since the previous mark to it """
+    global last_mark
+    global nested_time
+
+    now = time.perf_counter()
+    frame_phases[phase] += now - last_mark - nested_time
+    last_mark = now
+    nested_time = 0.0
+
+
+def AddNested(phase: str, seconds: float):
+    """ Attributes time spent within another phase to the provided phase instead """
+    global nested_time
+
+    frame_phases[phase] += seconds
+    nested_time += seconds
+
+
+def AddCount(name: str, count: int = 1):
+    """ Adds to the provided count for the current frame """
+    frame_counts[name] = frame_counts.get(name, 0) + count
+
+
+def EndFrame():
+    """ Marks the end of the current frame, recording its timings """
+    global last_frame_counts
+    global counted_frames
+
+    history.append((time.perf_counter() - frame_start, dict(frame_phases)))
+    last_frame_counts = dict(frame_counts)
+    counted_frames += 1
+    for name, count in frame_counts.items():
+        totals = count_totals.setdefault(name, {"total": 0, "max": 0})
+        totals["total"] += count
+        totals["max"] = max(totals["max"], count)
+
+
+def RecordSceneLoad(scene_file: str, seconds: float):
+    scene_loads.append((scene_file, seconds))
+
+
+def GetSummary() -> dict:
+    """
+    Returns a summary of the recorded frames, including frame time percentiles, the average time spent in each
+    phase, and the per-frame counts (IE. Blits). All times are in milliseconds
+    """
+    frame_times = sorted(frame_time * 1000 for frame_time, phases in history)
+    if not frame_times:
+        return {"frames": 0}
+
+    return {
+        "frames": len(frame_times),
+        "frame_time": {
+            "mean": sum(frame_times) / len(frame_times),
+            "p50": Percentile(frame_times, 50),
+            "p90": Percentile(frame_times, 90),
+            "p95": Percentile(frame_times, 95),
+            "p99": Percentile(frame_times, 99),
+            "max": frame_times[-1]
+        },
+        "phases": {
+            phase: {
+                "mean": sum(phases[phase] for frame_time, phases in history) * 1000 / len(history),
+                "p95": Percentile(sorted(phases[phase] * 1000 for frame_time, phases in history), 95),
+                "total": sum(phases[phase] for frame_time, phases in history) * 1000
+            }
+            for phase in PHASES
+        },
+        "counts": {
+            name: {"mean": totals["total"] / counted_frames, "max": totals["max"], "total": totals["total"]}
+            for name, totals in count_totals.items()
+        },
+        "scene_loads": [{"scene": scene_file, "time": seconds * 1000} for scene_file, seconds in scene_loads]
+    }
+
+
+def Percentile(sorted_values: list, percentile: float) -> float:
+    """ Returns the provided percentile of the provided sorted values, using the nearest-rank method """
+    index = max(0, math.ceil(len(sorted_values) * percentile / 100) - 1)
+    return sorted_values[index]
+
+
+def GetPeakMemory() -> int:
+    """ Returns the peak resident memory of the process in bytes. Returns 'None' where this isn't available (Windows) """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports this in kilobytes, while macOS reports it in bytes
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -13,18 +13,20 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import pygame
-from HBEngine.Core import settings, action_manager
+from HBEngine.Core import settings, surface_cache, action_manager, preloader, profiler, input_router, tween
 
 from HBEngine.Core.Objects.renderable_group import RenderableGroup
 from HBEngine.Core.Objects.interface import Interface
-from Tools.HBYaml.hb_yaml import Reader
+
+# How many draws an animating static renderable must go unchanged before it rejoins the static layer
+LAYER_SETTLE_DRAWS = 30
 
 
 class Scene:
     def __init__(self, scene_data_file: str):
 
         # Read in the active scene data
-        self.scene_data = Reader.ReadAll(scene_data_file)
+        self.scene_data = preloader.ReadAll(scene_data_file)
 
         # All renderable elements, including module and interface items. Only top-most parents objects will be present
         # here, as children are recursively drawn
@@ -41,58 +43,303 @@ class Scene:
         self.stop_interactions = False  # Flag for whether user control should be disabled for interactables
         self.allow_pausing = self.scene_data["settings"]["allow_pausing"]  # Allow disabling pause functionality (Valid for menu scenes or special sequences)
 
+        # Dirty-region rendering. Tracks which renderables were drawn as of the last draw, and the screen regions that
+        # have been repainted but not yet presented to the display
+        self.drawn_renderables = set()
+        self.drawn_list = None
+        self.update_rects = []
+        self.full_redraw = True
+        self.draw_pending = True  # Whether anything has been invalidated since the last draw
+
+        # The static layer. The renderables at the bottom of the draw list that rarely change (See 'UpdateLayers') are
+        # composited into a single screen-sized surface, so repainting beneath everything else only takes one blit
+        self.static_layer = None
+        self.static_renderables = ()
+        self.dynamic_renderables = ()
+        self.changed_static = set()  # The static renderables that changed in the last draw
+        self.animating_renderables = {}  # Structure: {<renderable>: <draws since it last changed>}
+
         # Keep track of delta time so time-based actions can be more accurate across systems
         self.delta_time = 0
 
     def Update(self, events):
-        self.active_renderables.Update()
+        input_router.Update(events, self.active_renderables.Get())
         action_manager.Update(events)
 
-    def Draw(self, renderables: list = None, is_recursing: bool = False):
+    def Invalidate(self, renderable: 'Renderable' = None):
+        """
+        Request that the scene be redrawn. Requests are coalesced, and the main loop performs a single draw at the end
+        of the frame regardless of how many were made.
+
+        Changes to a renderable's surface, position or visibility are detected automatically. If a renderable's surface
+        was drawn onto directly, provide it here so it's repainted regardless
+        """
+        if renderable:
+            renderable.MarkDirty()
+        self.draw_pending = True
+
+    def Draw(self):
+        """
+        Repaint the regions of the screen that changed since the last draw. Each renderable reports the regions it
+        touched (Where it was, and where it is now), and every renderable overlapping those regions is redrawn in
+        z-order. Repainted regions are collected in 'update_rects' so the main loop only presents what changed
+
+        Note: Prefer 'Invalidate' over calling this directly, as the main loop draws once per frame as needed
+        """
+        self.draw_pending = False
+        draw_list = self.active_renderables.GetDrawList()
+        self.UpdateLayers(draw_list)
+
+        static_dirty_rects = []
+        changed_static = set()
+        for renderable in self.static_renderables:
+            rects = renderable.GetDirtyRects()
+            if rects:
+                static_dirty_rects.extend(rects)
+                changed_static.add(renderable)
+
+        # Static renderables that change in consecutive draws are animating. Repainting them in both the layer and on
+        # screen doubles their cost, so they're drawn above the layer until they settle
+        animating = changed_static & self.changed_static
+        if animating:
+            for renderable in animating:
+                self.animating_renderables[renderable] = 0
+            self.UpdateLayers(draw_list)
+        self.changed_static = changed_static - animating
+
+        dirty_rects = list(static_dirty_rects)
+        for renderable in self.dynamic_renderables:
+            rects = renderable.GetDirtyRects()
+            dirty_rects.extend(rects)
+
+            if renderable in self.animating_renderables:
+                if rects or renderable in animating:
+                    self.animating_renderables[renderable] = 0
+                else:
+                    self.animating_renderables[renderable] += 1
+                    if self.animating_renderables[renderable] >= LAYER_SETTLE_DRAWS:
+                        del self.animating_renderables[renderable]
+
+        # Renderables that have left the render stack since the last draw still need the area they covered repainted.
+        # The draw list is only rebuilt when the render stack changes, so there is nothing to check otherwise
+        if draw_list is not self.drawn_list:
+            current_renderables = set(draw_list)
+            for renderable in self.drawn_renderables - current_renderables:
+                if renderable.drawn_rect:
+                    dirty_rects.append(renderable.drawn_rect)
+                    static_dirty_rects.append(renderable.drawn_rect)
+                renderable.ClearDrawnState()
+                self.animating_renderables.pop(renderable, None)
+            self.drawn_renderables = current_renderables
+            self.drawn_list = draw_list
+
+        screen_rect = settings.window.get_rect()
+        if self.full_redraw:
+            # We have no knowledge of what was on screen before this scene, so everything needs to be repainted
+            dirty_rects = [screen_rect]
+            self.full_redraw = False
+
+        # A layer is only worth it if it replaces more than one blit
+        blits = 0
+        if len(self.static_renderables) > 1:
+            if not self.static_layer:
+                self.static_layer = pygame.Surface(screen_rect.size, 0, settings.window)
+                static_dirty_rects = [screen_rect]
+
+            # Repaint the parts of the layer that changed, exactly as they'd be repainted on screen
+            layer_blits = 0
+            for region in self.MergeRects(static_dirty_rects, screen_rect):
+                self.static_layer.set_clip(region)
+                first_index = self.FindOccluder(self.static_renderables, region)
+                if first_index == -1:
+                    first_index = 0
+                    self.static_layer.fill((0, 0, 0))
+                layer_blits += self.BlitRegion(self.static_renderables[first_index:], region, self.static_layer)
+            self.static_layer.set_clip(None)
+
+            if profiler.enabled:
+                profiler.AddCount("layer_blits", layer_blits)
+
+            upper_renderables = self.dynamic_renderables
+        else:
+            self.static_layer = None
+            upper_renderables = draw_list
+
+        # Renderables only need blitting where they overlap a region (Which also excludes anything off-screen), and
+        # only if they aren't hidden beneath an opaque renderable covering the whole region
+        occluded = 0
+        for region in self.MergeRects(dirty_rects, screen_rect):
+            # Clip to the region so surfaces that only partially overlap it don't repaint anything beyond it
+            settings.window.set_clip(region)
+            first_index = self.FindOccluder(upper_renderables, region)
+            batch = []
+            if first_index == -1:
+                first_index = 0
+                if self.static_layer:
+                    batch.append((self.static_layer, region, region))
+                else:
+                    settings.window.fill((0, 0, 0))
+            else:
+                occluded += first_index
+
+            blits += self.BlitRegion(upper_renderables[first_index:], region, settings.window, batch)
+            self.update_rects.append(region)
+
+        settings.window.set_clip(None)
+
+        if profiler.enabled:
+            profiler.AddCount("blits", blits)
+            profiler.AddCount("occluded", occluded)
+
+    def UpdateLayers(self, draw_list: tuple):
+        """
+        Split the draw list into the static layer and the renderables drawn above it. The static layer is the longest
+        run of renderables from the bottom of the draw list that are flagged as 'static', or that have a z-order below
+        the 'static_layer_z_order' project setting. Static renderables are free to change, but each change repaints
+        the affected part of the layer as well as the screen, so any that are animating end the layer (See 'Draw').
+
+        The split is checked every draw, so changes to the draw list, the setting or a renderable's 'static' flag take
+        effect immediately
         """
-        Draw all active renderables and interfaces to the screen. If a list of renderables are provided, only those
-        are drawn.
+        z_threshold = settings.GetProjectSetting("Performance", "static_layer_z_order")
+        static_count = 0
+        for renderable in draw_list:
+            if renderable in self.animating_renderables:
+                break
+            if not renderable.static and renderable.z_order >= z_threshold:
+                # Renderables that only group others (IE. Interfaces) don't draw anything themselves, so they don't end
+                # the layer
+                if not renderable.children or renderable.GetSurface().get_width() > 0:
+                    break
+            static_count += 1
+
+        # Anything that joined or left the layer may not have changed on screen, so the layer is repainted in full
+        static_renderables = draw_list[:static_count]
+        if static_renderables != self.static_renderables:
+            self.static_layer = None
+
+        self.static_renderables = static_renderables
+        self.dynamic_renderables = draw_list[static_count:]
+
+    @staticmethod
+    def BlitRegion(renderables: tuple, region: pygame.Rect, target: pygame.Surface, batch: list = None) -> int:
         """
-        if not renderables and is_recursing is False:
-            renderables = self.active_renderables.Get()
+        Blit each of the provided renderables that overlaps the region to 'target', in order. Blits are submitted in
+        batches to avoid paying for each one individually, and are appended to 'batch' if provided. Renderables with
+        partial alpha end the current batch, as the alpha is applied to their surface only for the duration of their
+        own blit. Returns how many blits were made
+        """
+        if batch is None:
+            batch = []
+
+        blits = len(batch)
+        calls = 0
+        for renderable in renderables:
+            if renderable.drawn_rect and region.colliderect(renderable.drawn_rect):
+                blits += 1
+                if renderable.alpha >= 255:
+                    batch.append((renderable.GetRenderSurface(), renderable.drawn_rect))
+                else:
+                    if batch:
+                        target.blits(batch, doreturn=False)
+                        batch = []
+                        calls += 1
+                    Scene.Blit(renderable, target)
+                    calls += 1
+
+        if batch:
+            target.blits(batch, doreturn=False)
+            calls += 1
+
+        if profiler.enabled:
+            profiler.AddCount("blit_calls", calls)
+
+        return blits
+
+    @staticmethod
+    def FindOccluder(renderables: tuple, region: pygame.Rect) -> int:
+        """
+        Returns the index of the top-most renderable that covers the entirety of the provided region with opaque pixels.
+        Nothing beneath it is visible in the region. Returns -1 if there isn't one
+        """
+        for index in range(len(renderables) - 1, -1, -1):
+            renderable = renderables[index]
+            if renderable.drawn_rect and renderable.drawn_rect.contains(region) and renderable.IsOpaque():
+                return index
 
-        # Don't redraw unless we have items to actually draw. This also prevents last minute draw requests during
-        # scene changes while cleanup is happening
-        if renderables:
-            # Sort the renderable elements by their z-order (Lowest to Highest).
-            renderables = sorted(renderables, key=lambda renderable: renderable.z_order)
+        return -1
 
-            # Draw any renderables using the screen space multiplier to fit the new resolution
-            for item in renderables:
-                if item.visible:
-                    settings.window.blit(item.GetSurface(), (item.rect.x, item.rect.y))
+    @staticmethod
+    def Blit(renderable: 'Renderable', target: pygame.Surface = None):
+        """
+        Blit the provided renderable to the window (Or 'target' if provided) at the location it was last drawn,
+        applying its render state
+        """
+        if target is None:
+            target = settings.window
+
+        surface = renderable.GetRenderSurface()
+        if renderable.alpha >= 255:
+            target.blit(surface, renderable.drawn_rect)
+        else:
+            # Surfaces may be shared, so only apply the alpha for the duration of the blit. Changing the alpha drops any
+            # RLE encoding, so cached surfaces are restored to the format they were cached in. Their flags can't be
+            # relied on for this, as the encoding isn't reported until the surface is first blitted
+            # (See 'surface_cache.Convert')
+            original_alpha = surface.get_alpha()
+            surface.set_alpha(max(renderable.alpha, 0))
+            target.blit(surface, renderable.drawn_rect)
+            if not surface_cache.RestoreFormat(surface):
+                surface.set_alpha(original_alpha)
+
+    @staticmethod
+    def MergeRects(rects: list, bounds: pygame.Rect) -> list:
+        """
+        Clip the provided rects to the given bounds, then merge any that overlap. Returns a list of non-overlapping
+        rects
+        """
+        merged = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect.w == 0 or rect.h == 0:
+                continue
 
-                #@TODO: Review if this causes redundant drawing
-                # Draw any child renderables after drawing the parent
-                if item.children:
-                    children = sorted(item.children, key=lambda child_item: child_item.z_order)
-                    for child in children:
-                        if child.visible:
-                            settings.window.blit(child.GetSurface(), (child.rect.x, child.rect.y))
+            # Merging two rects can cause the result to overlap rects that were previously separate, so keep absorbing
+            # until there is nothing left to overlap
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
 
-                            # Recurse if this child has children
-                            if child.children:
-                                self.Draw(child.children, True)
+            merged.append(rect)
 
-    def SwitchScene(self, scene_file):
-        """ Clears all renderables, and requests a scene change """
+        return merged
+
+    def SwitchScene(self, scene_file: str, loading_interface: str = None):
+        """
+        Requests a scene change. The new scene is preloaded in the background while this scene continues to run, and
+        the switch happens at the end of the frame in which preloading finishes. If provided, 'loading_interface' is
+        shown in the meantime (See 'preloader.GetProgress' for tracking progress)
+        """
+        self.stop_interactions = True
+        if loading_interface and loading_interface != "None":
+            self.LoadInterface(loading_interface)
+
+        preloader.Preload(scene_file)
+        settings.pending_scene = scene_file
+
+    def Unload(self):
+        """ Clears all actions, renderables and sounds in preparation for the scene being replaced """
         action_manager.Clear()  # Clear actions
+        tween.Clear()  # Clear animations
 
         self.active_renderables.Clear()  # Clear graphics
+        input_router.Reset()  # Clear input
         for sound in self.active_sounds.values():  # Clear SFX
             sound.Stop()
         if self.active_music:  # Clear music
             self.active_music.Stop()
 
-        from HBEngine import hb_engine
-        hb_engine.LoadScene(scene_file)
-
-
     def LoadSceneData(self):
         """ Read the scene yaml file, and prepare the scene by spawning object classes, storing scene values, etc """
         # Load any applicable interfaces
@@ -112,11 +359,16 @@ class Scene:
             for action_index, action_data in self.scene_data['settings']['start_actions'].items():
                 action_manager.PerformAction(action_data['action'], action_data['action']['action'])
 
-        self.Draw()
+        # Start preloading any scenes this scene is likely to lead to
+        if self.scene_data['settings'].get('preload_scenes'):
+            for element_name, element_data in self.scene_data['settings']['preload_scenes'].items():
+                preloader.Preload(element_data['scene_file'])
+
+        self.Invalidate()
 
     def LoadInterface(self, interface_file: str, interface_class: type = Interface, parent: 'Renderable' = None) -> Interface:
         if interface_file:
-            interface = interface_class(Reader.ReadAll(settings.ConvertPartialToAbsolutePath(interface_file)))
+            interface = interface_class(preloader.ReadAll(settings.ConvertPartialToAbsolutePath(interface_file)))
 
             # Add to the scene or to a parent if applicable
             if parent:
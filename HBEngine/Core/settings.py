@@ -33,11 +33,23 @@ def LoadProjectSettings(partial_file_path: str = "Config/Game.yaml"):
     global project_settings
     global resolution
     global resolution_options
+    global canvas_resolution
     global project_setting_listeners
 
     file_path = ConvertPartialToAbsolutePath(partial_file_path)
     project_settings = Reader.ReadAll(file_path)
 
+    # Projects created with older versions of the engine may be missing settings that have since been added. Fill these
+    # in using the engine's defaults
+    engine_settings = Reader.ReadAll(f"{root_dir}/HBEngine/Config/Game.yaml")
+    for cat, settings in engine_settings.items():
+        if cat not in project_settings:
+            project_settings[cat] = settings
+        else:
+            for name, val in settings.items():
+                if name not in project_settings[cat]:
+                    project_settings[cat][name] = val
+
     # Initialize the listener dict with keys for each available settings
     for cat, settings in project_settings.items():
         project_setting_listeners[cat] = {}
@@ -47,6 +59,10 @@ def LoadProjectSettings(partial_file_path: str = "Config/Game.yaml"):
     # Apply the effects of various project settings
     resolution = tuple(map(int, project_settings['Graphics']['resolution']['value'].split('x')))
     resolution_options = project_settings['Graphics']['resolution']['options']
+    if project_settings['Graphics']['canvas_mode']['value']:
+        canvas_resolution = tuple(map(int, project_settings['Graphics']['canvas_resolution']['value'].split('x')))
+    else:
+        canvas_resolution = None
 
 def SaveProjectSettings(file_path: str = "Config/Game.yaml"):
     """ Saves the project settings to the provided file path. Defaults to 'Config/Game.yaml' if no path is provided """
@@ -154,10 +170,18 @@ def ConvertPartialToAbsolutePath(partial_path):
 # --- Core engine references managed by 'hb_engine.py' ---
 modules = {}
 clock = None
-window = None
+window = None  # The surface everything is drawn to. This is the display, unless a canvas is in use (See 'canvas_resolution')
+display = None
 scene = None
+pending_scene = None  # The scene file to switch to once it has finished preloading
 input_owner = None
 paused = False
+frame_count = 0  # The number of frames run since the game started
+
+# Mouse state, tracked from input events rather than polled so that scripted input (IE. Benchmarks) behaves the same as
+# real input
+mouse_pos = (0, 0)
+mouse_pressed = (False, False, False)
 
 root_dir = os.getcwd().replace("\\", "/")
 project_root = ""
@@ -169,6 +193,10 @@ resolution = (1280, 720)
 resolution_options = None
 resolution_multiplier = 1
 
+# In canvas mode, everything is drawn at this fixed resolution regardless of the window's resolution, and the result is
+# scaled to fit the window as it's presented. 'None' if canvas mode is disabled
+canvas_resolution = None
+
 # When objects need to be aware of changes to settings (IE. "mute" checkbox renderable needs
 # to change based on the mute setting), we need a way of tracking who needs to be informed. These dicts
 # represents that tracking
@@ -0,0 +1,89 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import OrderedDict
+import pygame
+from HBEngine.Core.surface_cache import ResolvePath
+
+"""
+An engine-wide cache of decoded sound effects, keyed by resolved file path. Sounds are stored as raw samples in the
+mixer's format, so creating a sound from a cached entry skips decoding the file entirely.
+
+Entries are evicted in least-recently-used order whenever the cache exceeds its memory budget. Sounds that are already
+playing hold their own copy of the samples, so evicting their entry doesn't affect them
+"""
+
+budget = 64 * 1024 * 1024  # In bytes
+
+# Structure: {<resolved_path>: <raw samples>}. Ordered from least to most recently used
+entries = OrderedDict()
+total_size = 0
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0
+}
+
+
+def Load(path: str) -> bytes:
+    """ Returns the raw samples for the provided sound file, decoding it if it isn't already cached """
+    key = ResolvePath(path)
+    samples = entries.get(key)
+
+    if samples is not None:
+        stats["hits"] += 1
+        entries.move_to_end(key)
+    else:
+        stats["misses"] += 1
+        samples = pygame.mixer.Sound(key).get_raw()
+        Store(path, samples)
+
+    return samples
+
+
+def Store(path: str, samples: bytes):
+    """ Adds already decoded samples to the cache (IE. Sounds decoded ahead of time by the preloader) """
+    global total_size
+
+    key = ResolvePath(path)
+    if key in entries:
+        return
+
+    entries[key] = samples
+    total_size += len(samples)
+
+    # Evict least recently used entries until we're within budget, always keeping the newest one
+    while total_size > budget and len(entries) > 1:
+        evicted_key, evicted_samples = entries.popitem(last=False)
+        total_size -= len(evicted_samples)
+        stats["evictions"] += 1
+
+
+def Contains(path: str) -> bool:
+    """ Returns whether the provided sound file is cached """
+    return ResolvePath(path) in entries
+
+
+def Clear():
+    """ Remove all entries from the cache """
+    global total_size
+
+    entries.clear()
+    total_size = 0
+
+
+def GetStats() -> dict:
+    """ Returns a copy of the cache statistics, including the current entry count and memory usage """
+    return {**stats, "entries": len(entries), "size": total_size, "budget": budget}
@@ -0,0 +1,267 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import weakref
+from collections import OrderedDict
+import pygame
+from HBEngine.Core import tracer
+
+"""
+An engine-wide cache of converted image surfaces, keyed by resolved file path and scale multiplier. Renderables that use
+the same image share a single surface instead of each decoding their own copy from disk.
+
+Cached surfaces are shared, and must never be edited in place. Per-instance changes such as alpha, flipping and tinting
+are applied while drawing instead (See the render state in 'Renderable').
+
+Images are converted to the cheapest format that preserves them as they're added (See 'Convert'). The chosen format is
+recorded with each entry, and the scene uses it to skip drawing anything hidden beneath opaque surfaces (See 'IsOpaque').
+
+Each entry tracks how many renderables are using it. Once nothing is using an entry, it is kept around in case it's
+requested again (IE. Returning to a previous scene), but becomes eligible for eviction. Unused entries are evicted in
+least-recently-used order whenever the cache exceeds its memory budget
+"""
+
+FORMATS = ("opaque", "colorkey", "alpha")  # See 'Convert'
+
+budget = 256 * 1024 * 1024  # In bytes. Only unused entries are evicted to meet this, so it may be exceeded temporarily
+
+# Structure: {(<resolved_path>, <multiplier>): {"surface": <Surface>, "size": <bytes>, "refs": <int>, "format": <str>}}.
+# Ordered from least to most recently used
+entries = OrderedDict()
+total_size = 0
+
+# Maps the id of each cached surface back to its key so renderables can look up where their surface came from
+surface_keys = {}
+resolved_paths = {}
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0
+}
+
+
+def Load(path: str, owner: object, multiplier=1) -> pygame.Surface:
+    """
+    Returns the surface for the provided image path, loading and converting it if it isn't already cached. If a
+    multiplier other than 1 is provided, the surface is rescaled accordingly and cached separately.
+
+    The surface is considered in use until 'owner' is garbage collected
+    """
+    key = (ResolvePath(path), multiplier if not isinstance(multiplier, list) else tuple(multiplier))
+    entry = entries.get(key)
+
+    if entry:
+        stats["hits"] += 1
+        entries.move_to_end(key)
+        entry["refs"] += 1
+    else:
+        stats["misses"] += 1
+        if multiplier == 1:
+            if tracer.enabled:
+                start_time = time.perf_counter()
+                surface, surface_format = Convert(pygame.image.load(key[0]))
+                tracer.AddSpan("Decode Image", "assets", start_time, time.perf_counter(), {"file": key[0]})
+            else:
+                surface, surface_format = Convert(pygame.image.load(key[0]))
+        else:
+            # Build from the unscaled surface so it's shared with any unscaled users as well
+            base_surface = Load(path, owner)
+            surface, surface_format = Convert(pygame.transform.smoothscale(
+                base_surface,
+                (round(base_surface.get_width() * key[1][0]), round(base_surface.get_height() * key[1][1]))
+            ))
+
+        entry = _CreateEntry(surface, surface_format, 1)
+        _AddEntry(key, entry)
+
+    # Release our reference once the owner is gone. Skip this at exit, as the cache is going away regardless
+    weakref.finalize(owner, Release, key).atexit = False
+
+    return entry["surface"]
+
+
+def Store(path: str, surface: pygame.Surface):
+    """
+    Converts and adds an already decoded surface to the cache without using it, so it's ready for when it's requested
+    (IE. Images decoded ahead of time by the preloader). Like any unused entry, it may be evicted to meet the budget
+    """
+    key = (ResolvePath(path), 1)
+    if key not in entries:
+        _AddEntry(key, _CreateEntry(*Convert(surface), 0))
+
+
+def Convert(surface: pygame.Surface) -> tuple:
+    """
+    Converts a decoded image to the display's pixel format, using the cheapest format that preserves its appearance.
+    Returns the converted surface, and which of the following formats was chosen:
+        - opaque:   No transparency. Converted without an alpha channel, so blitting it is a plain copy
+        - colorkey: A single transparent color
+        - alpha:    Per-pixel alpha
+
+    Cached surfaces are never edited, so transparent surfaces are RLE encoded, allowing blits to skip over transparent
+    runs of pixels. This can't be done for surfaces that are edited, as editing them requires decoding them first
+    """
+    colorkey = surface.get_colorkey()
+    if colorkey is not None:
+        surface = surface.convert()
+        surface.set_colorkey(colorkey, pygame.RLEACCEL)
+        return surface, "colorkey"
+
+    if surface.get_flags() & pygame.SRCALPHA:
+        converted = surface.convert_alpha()
+        if not _CheckOpaque(converted):
+            converted.set_alpha(255, pygame.RLEACCEL)
+            return converted, "alpha"
+
+    return surface.convert(), "opaque"
+
+
+def Contains(path: str) -> bool:
+    """ Returns whether the unscaled surface for the provided image path is cached """
+    return (ResolvePath(path), 1) in entries
+
+
+def Release(key: tuple):
+    """ Release one reference to the entry of the provided key. Called automatically when an owner is collected """
+    entry = entries.get(key)
+    if entry:
+        entry["refs"] = max(entry["refs"] - 1, 0)
+        if entry["refs"] == 0:
+            EnforceBudget()
+
+
+def IsCached(surface: pygame.Surface) -> bool:
+    """ Returns whether the provided surface belongs to the cache, and is therefore potentially shared """
+    return id(surface) in surface_keys
+
+
+def IsOpaque(surface: pygame.Surface) -> bool:
+    """ Returns whether the provided surface is cached, and has no transparent pixels """
+    key = surface_keys.get(id(surface))
+    if key:
+        return entries[key]["format"] == "opaque"
+
+    return False
+
+
+def RestoreFormat(surface: pygame.Surface) -> bool:
+    """
+    Re-applies the alpha and RLE encoding given to the provided cached surface by 'Convert', after they were changed
+    temporarily (IE. For a partially transparent blit). Returns whether the surface is cached
+    """
+    key = surface_keys.get(id(surface))
+    if not key:
+        return False
+
+    surface_format = entries[key]["format"]
+    if surface_format == "alpha":
+        surface.set_alpha(255, pygame.RLEACCEL)
+    else:
+        surface.set_alpha(None)
+        if surface_format == "colorkey":
+            surface.set_colorkey(surface.get_colorkey(), pygame.RLEACCEL)
+
+    return True
+
+
+def GetPath(surface: pygame.Surface) -> str:
+    """ Returns the resolved path of the provided cached surface. Returns 'None' if the surface isn't cached """
+    key = surface_keys.get(id(surface))
+    if key:
+        return key[0]
+
+    return None
+
+
+def SetBudget(new_budget: int):
+    """ Updates the memory budget (In megabytes), evicting unused entries if necessary """
+    global budget
+
+    budget = new_budget * 1024 * 1024
+    EnforceBudget()
+
+
+def EnforceBudget():
+    """ Evict unused entries, least recently used first, until the cache is within its memory budget """
+    if total_size <= budget:
+        return
+
+    for key in [key for key, entry in entries.items() if entry["refs"] == 0]:
+        _RemoveEntry(key)
+        stats["evictions"] += 1
+        if total_size <= budget:
+            break
+
+
+def Clear():
+    """ Remove all unused entries from the cache """
+    for key in [key for key, entry in entries.items() if entry["refs"] == 0]:
+        _RemoveEntry(key)
+
+
+def GetStats() -> dict:
+    """ Returns a copy of the cache statistics, including the current entry count and memory usage """
+    return {
+        **stats,
+        "entries": len(entries),
+        "in_use": sum(1 for entry in entries.values() if entry["refs"] > 0),
+        "size": total_size,
+        "budget": budget,
+        "formats": {
+            surface_format: sum(1 for entry in entries.values() if entry["format"] == surface_format)
+            for surface_format in FORMATS
+        }
+    }
+
+
+def ResolvePath(path: str) -> str:
+    """ Returns a normalized, absolute version of the provided path so each file only has one key """
+    if path not in resolved_paths:
+        resolved_paths[path] = os.path.normcase(os.path.realpath(path))
+
+    return resolved_paths[path]
+
+
+def _CreateEntry(surface: pygame.Surface, surface_format: str, refs: int) -> dict:
+    return {"surface": surface, "size": surface.get_pitch() * surface.get_height(), "refs": refs, "format": surface_format}
+
+
+def _AddEntry(key: tuple, entry: dict):
+    global total_size
+
+    entries[key] = entry
+    surface_keys[id(entry["surface"])] = key
+    total_size += entry["size"]
+    EnforceBudget()
+
+
+def _RemoveEntry(key: tuple):
+    global total_size
+
+    # Releases can be triggered by garbage collection at any time, including in the middle of another removal
+    entry = entries.pop(key, None)
+    if not entry:
+        return
+
+    del surface_keys[id(entry["surface"])]
+    total_size -= entry["size"]
+
+
+def _CheckOpaque(surface: pygame.Surface) -> bool:
+    """ Returns whether every pixel in the provided surface is fully opaque """
+    # Only pixels with an alpha above the threshold are set in the mask
+    return pygame.mask.from_surface(surface, 254).count() == surface.get_width() * surface.get_height()
@@ -0,0 +1,148 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import OrderedDict
+import pygame
+
+"""
+Line layout for wrapped text. Determines where a block of text breaks into lines, and where each line is placed within
+the trimmed text surface, without rendering anything.
+
+Layouts only depend on the text, font and bounds, so they're memoized on those values. Anything that re-renders the
+same text (IE. Changing its color) reuses the existing layout, and only needs to render the glyphs again
+"""
+
+max_layouts = 1024
+
+# Structure: {(<text>, <font_key>, <bounds>, <center_align>): <layout>}. Ordered from least to most recently used
+layouts = OrderedDict()
+
+# Structure: {<font_key>: <height>}
+font_heights = {}
+
+stats = {
+    "hits": 0,
+    "misses": 0
+}
+
+
+def GetLayout(text: str, font_obj: pygame.font.Font, font_key: tuple, bounds: tuple, center_align: bool) -> dict:
+    """
+    Returns the layout for the provided text when wrapped within 'bounds' (The pixel size of the wrap area). 'font_key'
+    must uniquely identify 'font_obj' (IE. Its path and size).
+
+    Layouts are returned in the form: {"size": (<width>, <height>), "lines": ((<text>, (<x>, <y>)), ...)}, where
+    positions are relative to the trimmed surface. Layouts are shared, and must not be modified
+    """
+    key = (text, font_key, bounds, center_align)
+    layout = layouts.get(key)
+
+    if layout:
+        stats["hits"] += 1
+        layouts.move_to_end(key)
+        return layout
+
+    stats["misses"] += 1
+    if font_key not in font_heights:
+        font_heights[font_key] = font_obj.size("Tg")[1]
+
+    layout = _BuildLayout(text, font_obj, font_heights[font_key], bounds, center_align)
+
+    layouts[key] = layout
+    if len(layouts) > max_layouts:
+        layouts.popitem(last=False)
+
+    return layout
+
+
+def Clear():
+    """ Remove all memoized layouts """
+    layouts.clear()
+    font_heights.clear()
+
+
+def GetStats() -> dict:
+    """ Returns a copy of the layout statistics, including the current layout count """
+    return {**stats, "layouts": len(layouts)}
+
+
+def FindBreak(font_obj: pygame.font.Font, line: str, max_width: int) -> int:
+    """
+    Returns the index at which the provided line exceeds 'max_width', or the length of the line if it fits entirely.
+    Measured widths only grow as characters are added, so the index is found with a binary search
+    """
+    low = 1
+    high = len(line)
+    while low < high:
+        middle = (low + high) // 2
+        if font_obj.size(line[:middle])[0] >= max_width:
+            high = middle
+        else:
+            low = middle + 1
+
+    return low
+
+
+def _BuildLayout(text: str, font_obj: pygame.font.Font, font_height: int, bounds: tuple, center_align: bool) -> dict:
+    width, height = bounds
+
+    base_top = 0
+    line_spacing = 0
+    largest_width = 0  # The size of the largest line
+    total_height = 0  # The height of all lines including between-line spacing
+    lines = []
+
+    # Pre-split the text based on any specified newlines
+    text_to_process = text.split("\n")
+
+    if center_align:
+        # Vertically center the text
+        base_top += (height / max(len(text_to_process), 2)) - (font_height / 2)
+
+    # Process each line, applying wrapping where necessary
+    for line in text_to_process:
+        while True:
+            # Determine if the text will exceed the bounds height
+            if base_top + font_height > height:
+                break
+
+            # If we didn't reach the end of the string, break on the last whitespace before the bounds were exceeded. If
+            # there isn't one, the word is longer than the bounds, so break it wherever it no longer fits
+            i = FindBreak(font_obj, line, width)
+            if i < len(line):
+                i = line.rfind(" ", 0, i) + 1 or max(i - 1, 1)
+
+            line_width = font_obj.size(line[:i])[0]
+            largest_width = max(largest_width, line_width)
+
+            # If applicable, center align the line based on its unique size
+            if center_align:
+                lines.append((line[:i], (int((width - line_width) / 2), int(base_top))))
+            else:
+                lines.append((line[:i], (0, int(base_top))))
+
+            base_top += font_height + line_spacing
+            total_height += font_height + line_spacing
+
+            # Remove the text we just laid out, exiting if we're finished processing everything in this line
+            line = line[i:]
+            if not line:
+                break
+
+    # Trim the excess space between the text and the wrap bounds (Vertically and horizontally) by offsetting each line
+    if center_align:
+        offset = (int(-(width - largest_width) / 2), int(-(height - total_height) / 2))
+        lines = [(line, (pos[0] + offset[0], pos[1] + offset[1])) for line, pos in lines]
+
+    return {"size": (largest_width, total_height), "lines": tuple(lines)}
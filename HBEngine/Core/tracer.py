@@ -0,0 +1,105 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from Tools.HBYaml.hb_yaml import Reader
+
+"""
+Records a timeline of what the engine spent its time on, written in the Chrome 'trace_event' format. Trace files can be
+opened in Perfetto (https://ui.perfetto.dev) or 'chrome://tracing' to see exactly which work landed in a given frame.
+
+Tracing is enabled with the '--trace <file>' argument, or by setting the 'HBENGINE_TRACE' environment variable to the
+file to write to. The trace is written once the game loop exits (See 'Write').
+
+Spans are recorded for frames, action starts and updates, scene loads, HBYaml reads and parses, image decodes, and text
+layout. Work done on other threads (IE. The preloader) is recorded on its own track.
+
+Tracing is disabled by default. Every call site checks 'enabled' first, so there is no cost when it's off
+"""
+
+ENVIRONMENT_VARIABLE = "HBENGINE_TRACE"
+
+enabled = False
+output_file = None
+
+# The most recent spans, in the 'trace_event' format. Older spans are dropped once the limit is reached so long sessions
+# don't grow without bound
+events = deque(maxlen=1000000)
+
+origin = 0.0  # The time tracing was enabled. Span timestamps are relative to this
+process_id = os.getpid()
+thread_names = {}  # Structure: {<thread_id>: <thread_name>}
+
+
+def Enable(new_output_file: str):
+    """ Enables tracing, writing the trace to the provided file when 'Write' is called """
+    global enabled
+    global output_file
+    global origin
+
+    output_file = new_output_file
+    origin = time.perf_counter()
+    enabled = True
+
+    # HBYaml is shared with the editor, so it reports its reads through a listener rather than depending on the engine
+    Reader.listener = OnRead
+
+
+def Disable():
+    global enabled
+
+    enabled = False
+    Reader.listener = None
+
+
+def AddSpan(name: str, category: str, start_time: float, end_time: float, args: dict = None):
+    """ Records a span of work. Times are from 'time.perf_counter'. Safe to call from any thread """
+    thread = threading.current_thread()
+    if thread.ident not in thread_names:
+        thread_names[thread.ident] = thread.name
+
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": (start_time - origin) * 1000000,
+        "dur": (end_time - start_time) * 1000000,
+        "pid": process_id,
+        "tid": thread.ident
+    }
+    if args:
+        event["args"] = args
+
+    events.append(event)
+
+
+def OnRead(name: str, start_time: float, end_time: float, args: dict):
+    """ Listener for HBYaml reads and parses """
+    AddSpan(name, "yaml", start_time, end_time, args)
+
+
+def Write():
+    """ Writes all recorded spans to the output file """
+    # Name each thread's track after the thread
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_id, "args": {"name": thread_name}}
+        for thread_id, thread_name in list(thread_names.items())
+    ]
+
+    with open(output_file, "w") as f:
+        json.dump({"traceEvents": metadata + list(events), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,237 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import math
+from HBEngine.Core import settings
+
+"""
+Tweens animate a property of a renderable from one value to another over a set duration, following an easing curve.
+Tweens can be combined into groups, which play them all at once, and sequences, which play them one after another.
+
+Every active tween is advanced in a single pass alongside the actions each frame (See 'action_manager'), after which
+the renderables that changed are invalidated together. Tweens played while a pass is underway (IE. From a completion
+callback) begin advancing in the next pass.
+
+The supported properties are:
+    - alpha:                The renderable's opacity (0 - 255)
+    - position:             The renderable's normalized position. Children don't follow their parent
+    - scale:                The size the renderable is drawn at, relative to its actual size. Scales around its center
+    - tint:                 An RGB(A) color multiplied into the renderable
+    - visible_characters:   How many characters of a text renderable's text are shown
+"""
+
+EASINGS = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1 - (1 - t) * (1 - t),
+    "ease_in_out": lambda t: 2 * t * t if t < 0.5 else 1 - math.pow(-2 * t + 2, 2) / 2,
+    "ease_in_cubic": lambda t: t * t * t,
+    "ease_out_cubic": lambda t: 1 - math.pow(1 - t, 3),
+    "ease_in_out_cubic": lambda t: 4 * t * t * t if t < 0.5 else 1 - math.pow(-2 * t + 2, 3) / 2,
+}
+
+
+def SetPosition(renderable, value: tuple):
+    renderable.position = value
+    renderable.RecalculateSize(settings.resolution_multiplier)
+
+
+# Structure: {<property>: (<getter>, <setter>)}
+PROPERTIES = {
+    "alpha": (lambda r: r.alpha, lambda r, value: setattr(r, "alpha", value)),
+    "position": (lambda r: tuple(r.position), SetPosition),
+    "scale": (lambda r: r.scale, lambda r, value: setattr(r, "scale", value)),
+    "tint": (
+        lambda r: tuple(r.tint) if r.tint else (255, 255, 255),
+        lambda r, value: setattr(r, "tint", tuple(round(channel) for channel in value))
+    ),
+    "visible_characters": (
+        lambda r: len(r.text) if r.visible_characters is None else r.visible_characters,
+        lambda r, value: r.SetVisibleCharacters(int(value))
+    ),
+}
+
+# Tweens currently playing, in the order they were played
+active_tweens = []
+
+# Tweens played since the last pass. These are added to 'active_tweens' at the start of the next pass
+starting_tweens = []
+
+
+class Tween:
+    """
+    Animates 'prop' of 'renderable' to 'end' over 'duration' seconds. If 'start' isn't provided, the tween starts from
+    the property's value at the time it's played. 'on_complete' is called once the tween finishes, or is skipped
+    """
+    def __init__(self, renderable, prop: str, end, duration: float, start=None, easing: str = "linear",
+                 on_complete: callable = None):
+        if prop not in PROPERTIES:
+            raise ValueError(f"Unable to tween '{prop}' - Supported properties are: {', '.join(PROPERTIES)}")
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing '{easing}' - Supported easings are: {', '.join(EASINGS)}")
+
+        self.renderable = renderable
+        self.getter, self.setter = PROPERTIES[prop]
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = EASINGS[easing]
+        self.on_complete = on_complete
+
+        self.elapsed = 0
+        self.complete = False
+
+    def Start(self):
+        """ Applies the starting value """
+        if self.start is None:
+            self.start = self.getter(self.renderable)
+        self.setter(self.renderable, self.start)
+
+        # Tweens without a duration finish immediately
+        if self.duration <= 0:
+            self.Skip()
+
+    def Advance(self, delta_time: float, changed: set):
+        """ Advances the tween by the provided time, adding any renderables that changed to 'changed' """
+        self.elapsed += delta_time
+        if self.elapsed >= self.duration:
+            self.Skip()
+        else:
+            self.setter(self.renderable, Interpolate(self.start, self.end, self.easing(self.elapsed / self.duration)))
+        changed.add(self.renderable)
+
+    def Skip(self):
+        """ Jumps straight to the end of the tween """
+        if not self.complete:
+            self.setter(self.renderable, self.end)
+            self.complete = True
+            if self.on_complete:
+                self.on_complete()
+
+
+class TweenGroup:
+    """ Plays the provided tweens (Or other groups and sequences) at the same time, completing once they all have """
+    def __init__(self, tweens: list, on_complete: callable = None):
+        self.tweens = tweens
+        self.on_complete = on_complete
+        self.complete = False
+
+    def Start(self):
+        for tween in self.tweens:
+            tween.Start()
+        self._CheckComplete()
+
+    def Advance(self, delta_time: float, changed: set):
+        for tween in self.tweens:
+            if not tween.complete:
+                tween.Advance(delta_time, changed)
+        self._CheckComplete()
+
+    def Skip(self):
+        for tween in self.tweens:
+            tween.Skip()
+        self._CheckComplete()
+
+    def _CheckComplete(self):
+        if not self.complete and all(tween.complete for tween in self.tweens):
+            self.complete = True
+            if self.on_complete:
+                self.on_complete()
+
+
+class TweenSequence:
+    """ Plays the provided tweens (Or groups and other sequences) one after another """
+    def __init__(self, tweens: list, on_complete: callable = None):
+        self.tweens = tweens
+        self.on_complete = on_complete
+        self.index = 0
+        self.complete = False
+
+    def Start(self):
+        self._StartNext()
+
+    def Advance(self, delta_time: float, changed: set):
+        self.tweens[self.index].Advance(delta_time, changed)
+        if self.tweens[self.index].complete:
+            self.index += 1
+            self._StartNext()
+
+    def Skip(self):
+        while not self.complete:
+            self.tweens[self.index].Skip()
+            self.index += 1
+            self._StartNext()
+
+    def _StartNext(self):
+        """ Starts the next tween in the sequence, skipping past any that complete immediately """
+        while self.index < len(self.tweens):
+            self.tweens[self.index].Start()
+            if not self.tweens[self.index].complete:
+                return
+            self.index += 1
+
+        self.complete = True
+        if self.on_complete:
+            self.on_complete()
+
+
+def Play(tween):
+    """ Starts playing the provided tween, group or sequence. Returns it for convenience """
+    tween.Start()
+    if not tween.complete:
+        starting_tweens.append(tween)
+    settings.scene.Invalidate()
+
+    return tween
+
+
+def Update(delta_time: float):
+    """ Advances every active tween, then invalidates the renderables that changed """
+    global active_tweens
+
+    if starting_tweens:
+        active_tweens.extend(tween for tween in starting_tweens if not tween.complete)
+        starting_tweens.clear()
+
+    if active_tweens:
+        changed = set()
+        for tween in active_tweens:
+            if not tween.complete:
+                tween.Advance(delta_time, changed)
+
+        active_tweens = [tween for tween in active_tweens if not tween.complete]
+
+        for renderable in changed:
+            renderable.MarkDirty()
+        if changed:
+            settings.scene.Invalidate()
+
+
+def IsActive() -> bool:
+    """ Returns whether any tweens are playing """
+    return bool(active_tweens or starting_tweens)
+
+
+def Clear():
+    """ Stops all tweens where they are. Used when the scene is unloaded """
+    active_tweens.clear()
+    starting_tweens.clear()
+
+
+def Interpolate(start, end, t: float):
+    """ Returns the value 't' (0 - 1) of the way from 'start' to 'end'. Sequences are interpolated element-wise """
+    if isinstance(start, (tuple, list)):
+        return tuple(s + (e - s) * t for s, e in zip(start, end))
+
+    return start + (end - start) * t
@@ -13,14 +13,25 @@
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
 import os
+import json
+import time
 import argparse
 import pygame
-from HBEngine.Core import settings
+from HBEngine.Core import settings, surface_cache, font_cache, preloader, profiler, action_stats, tracer, input_router, action_manager, tween
 from HBEngine.Core.scene import Scene
 from HBEngine.Core.Objects.interface_pause import InterfacePause
+from HBEngine.Core.Objects.perf_hud import PerfHUD
+from Tools.HBYaml import compiled_cache
 
 from pygame import mixer
 
+# The surface drawn to in canvas mode while the window is a different resolution. See 'SetupDisplay'
+canvas = None
+
+# Debug overlays
+perf_hud = None
+perf_hud_enabled_profiler = False  # Whether showing the HUD enabled the profiler, so it's disabled again when hidden
+
 
 def Initialize(project_path: str):
     """ Loads project information and paths, and updates the pygame module with project-specific settings """
@@ -35,72 +46,275 @@ def Initialize(project_path: str):
         settings.SetProjectSetting('Game', 'title', 'My Game')
     pygame.display.set_caption(settings.GetProjectSetting('Game', 'title'))
 
+    surface_cache.SetBudget(settings.GetProjectSetting('Performance', 'surface_cache_budget'))
+    settings.project_setting_listeners['Performance']['surface_cache_budget']['surface_cache'] = surface_cache.SetBudget
+    font_cache.SetLimit(settings.GetProjectSetting('Performance', 'font_cache_size'))
+    settings.project_setting_listeners['Performance']['font_cache_size']['font_cache'] = font_cache.SetLimit
 
-def Main():
-    # Debug toggles
-    show_fps = False
+    # Without a canvas, everything is laid out for the window's resolution, so it can only be changed in canvas mode
+    if settings.canvas_resolution:
+        settings.project_setting_listeners['Graphics']['resolution']['hb_engine'] = SetResolution
 
-    pygame.init()
-    mixer.init()
-    settings.clock = pygame.time.Clock()
-    settings.window = pygame.display.set_mode(settings.resolution)
-    pause_interface = None  # Instantiated and set during runtime
+    # Tracing can be enabled through the environment as well as the command line
+    if os.environ.get(tracer.ENVIRONMENT_VARIABLE) and not tracer.enabled:
+        tracer.Enable(os.environ[tracer.ENVIRONMENT_VARIABLE])
 
-    # Load the starting scene
-    if settings.GetProjectSetting("Game", "starting_scene"):
-        LoadScene(settings.GetProjectSetting("Game", "starting_scene"))
-    else:
-        raise ValueError("No starting scene was provided in the project settings")
-
-    # Start the game loop
-    is_running = True
-    while is_running is True:
-        events = pygame.event.get()
-
-        # Handle all system actions
-        for event in events:
-            if event.type == pygame.QUIT:
-                is_running = False
-            if event.type == pygame.KEYDOWN:
-                # Exit
-                if event.key == pygame.K_ESCAPE:
-                    if settings.scene:
-                        if settings.scene.allow_pausing:
-                            if settings.paused:
-                                Unpause()
-                                pause_interface = None
-                            else:
-                                pause_interface = Pause()
+    # Keep compiled versions of the project's files to avoid re-parsing them each time they're loaded
+    if settings.GetProjectSetting('Performance', 'compiled_cache'):
+        compiled_cache.Enable(os.path.join(settings.project_root, ".hbcache"))
 
+
+def Main(starting_scene: str = None, frame_callback: callable = None, fixed_delta: float = None):
+    """
+    Runs the game loop until the game is closed. The following are intended for automated runs (IE. Benchmarks):
+        starting_scene:     A scene file to start in instead of the project's starting scene
+        frame_callback:     Called with the frame number at the start of every frame. Useful for posting scripted input
+        fixed_delta:        A fixed delta time (In seconds) to use for every frame. This also uncaps the frame rate
+    """
+    # The trace is written however the run ends, including when an action quits the game or the starting scene fails
+    # to load
+    try:
+        pygame.init()
+        mixer.init()
+        settings.clock = pygame.time.Clock()
+        SetupDisplay()
+        settings.mouse_pos = ToCanvas(pygame.mouse.get_pos())
+        pause_interface = None  # Instantiated and set during runtime
+
+        # Load the starting scene
+        if not starting_scene:
+            starting_scene = settings.GetProjectSetting("Game", "starting_scene")
+        if starting_scene:
+            LoadScene(starting_scene)
+        else:
+            raise ValueError("No starting scene was provided in the project settings")
+
+        # Start the game loop
+        is_running = True
+        while is_running is True:
+            # If nothing is changing, block until there's input instead of repeatedly drawing the same frame.
+            # Automated runs always run every frame
+            idle_events = []
+            if fixed_delta is None and settings.GetProjectSetting("Performance", "idle_mode"):
+                idle_time = GetIdleTime()
+                if idle_time > 0:
+                    idle_events = Idle(idle_time)
+
+            if tracer.enabled:
+                frame_start = time.perf_counter()
+            if profiler.enabled:
+                profiler.StartFrame()
+            if frame_callback:
+                frame_callback(settings.frame_count)
+            settings.frame_count += 1
+
+            events = idle_events + pygame.event.get()
+            if settings.window is not settings.display:
+                events = MapMouseEvents(events)
+
+            # Handle all system actions
+            for event in events:
                 if event.type == pygame.QUIT:
                     is_running = False
-                # Debug - FPS
-                if event.key == pygame.K_F3:
-                    show_fps = not show_fps
-
-        if settings.paused:
-            settings.scene.active_renderables.Update([pause_interface])
-        elif settings.input_owner:
-            # Input owners lock out updates for everything but themselves. If one is active, only update it
-            settings.input_owner.Update(events)
-        else:
-            # Update scene logic. This drives the core game functionality
-            settings.scene.Update(events)
+                elif event.type == pygame.MOUSEMOTION:
+                    settings.mouse_pos = event.pos
+                elif event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
+                    settings.mouse_pos = event.pos
+                    if event.button <= 3:
+                        pressed = list(settings.mouse_pressed)
+                        pressed[event.button - 1] = event.type == pygame.MOUSEBUTTONDOWN
+                        settings.mouse_pressed = tuple(pressed)
+                if event.type == pygame.KEYDOWN:
+                    # Exit
+                    if event.key == pygame.K_ESCAPE:
+                        if settings.scene:
+                            # The outgoing scene can't be paused while the next one preloads
+                            if settings.scene.allow_pausing and not settings.pending_scene:
+                                if settings.paused:
+                                    Unpause()
+                                    pause_interface = None
+                                else:
+                                    pause_interface = Pause()
+
+                    if event.type == pygame.QUIT:
+                        is_running = False
+                    # Debug - Performance HUD
+                    if event.key == pygame.K_F3:
+                        TogglePerfHUD()
+
+            if profiler.enabled:
+                profiler.Mark("events")
+
+            if settings.pending_scene:
+                # The scene is being switched away from. Its running actions and animations (IE. A loading interface)
+                # continue, but input is withheld so nothing new is started while the next scene preloads
+                action_manager.Update([])
+                if profiler.enabled:
+                    profiler.Mark("scene_update")
+            elif settings.paused:
+                input_router.Update(events, [pause_interface])
+                if profiler.enabled:
+                    profiler.Mark("scene_update")
+            elif settings.input_owner:
+                # Input owners lock out updates for everything but themselves. If one is active, only update it
+                settings.input_owner.Update(events)
+                if profiler.enabled:
+                    profiler.Mark("modules")
+            else:
+                # Update scene logic. This drives the core game functionality
+                settings.scene.Update(events)
+                if profiler.enabled:
+                    profiler.Mark("scene_update")
+
+                # Update active modules. These provide supplementary features
+                for module_name, module_obj in settings.modules.items():
+                    module_obj.Update(events)
+                if profiler.enabled:
+                    profiler.Mark("modules")
+
+            # Collect anything that finished preloading in the background
+            preloader.Update()
+
+            # Scene changes are deferred to the end of the frame, and wait for the new scene to finish preloading
+            if settings.pending_scene and preloader.IsReady(settings.pending_scene):
+                LoadScene(settings.pending_scene)
+
+            if profiler.enabled:
+                profiler.Mark("loading")
+
+            # Draw everything that was invalidated this frame in a single pass
+            if settings.scene.draw_pending:
+                settings.scene.Draw()
+
+            if profiler.enabled:
+                profiler.Mark("draw")
+
+            # Present only the regions of the screen that were repainted this frame
+            Present(settings.scene.update_rects)
+            settings.scene.update_rects.clear()
+
+            if profiler.enabled:
+                profiler.Mark("present")
+                profiler.EndFrame()
+
+                if perf_hud:
+                    perf_hud.Refresh()
+
+            # Get the time in miliseconds converted to seconds since the last frame. Used to avoid frame dependency
+            # on actions
+            if fixed_delta is None:
+                settings.scene.delta_time = settings.clock.tick(60) / 1000
+            else:
+                settings.clock.tick()
+                settings.scene.delta_time = fixed_delta
+
+            if tracer.enabled:
+                tracer.AddSpan("Frame", "frames", frame_start, time.perf_counter(), {"frame": settings.frame_count})
+    finally:
+        if tracer.enabled:
+            tracer.Write()
+
+
+def GetIdleTime() -> float:
+    """
+    Returns how long (In seconds) the game loop can wait for input before anything needs updating. Returns 0 if
+    something needs updating every frame
+    """
+    if settings.scene.draw_pending or settings.pending_scene or preloader.IsBusy() or tween.IsActive() or perf_hud:
+        return 0
+
+    # Actions may be waiting for time to pass. Wake up once the first of them is done waiting
+    idle_time = settings.GetProjectSetting("Performance", "idle_timeout") / 1000
+    for action in action_manager.active_actions:
+        wake_delay = action.GetWakeDelay()
+        if wake_delay is None or wake_delay <= 0:
+            return 0
+        idle_time = min(idle_time, wake_delay)
+
+    return idle_time
+
+
+def Idle(timeout: float) -> list:
+    """ Blocks until an event arrives, or until the timeout (In seconds) passes. Returns the event that ended the wait """
+    start_time = time.perf_counter()
+    event = pygame.event.wait(max(round(timeout * 1000), 1))
+
+    # Only actions that are waiting for time to pass need to know how long we were idle. Otherwise, start timing the next
+    # frame from now so the time spent idle isn't treated as one very long frame
+    if not action_manager.active_actions:
+        settings.clock.tick()
+
+    if tracer.enabled:
+        tracer.AddSpan("Idle", "frames", start_time, time.perf_counter())
+
+    if event.type == pygame.NOEVENT:
+        return []
+
+    return [event]
+
+
+def SetupDisplay():
+    """
+    Creates the window at the current resolution. In canvas mode, everything is drawn to a canvas at the canvas
+    resolution instead, which is scaled to fit the window as it's presented (See 'Present'). As the canvas never changes
+    size, nothing needs to be laid out or rescaled again when the resolution changes
+    """
+    global canvas
+
+    settings.display = pygame.display.set_mode(settings.resolution)
+    if settings.canvas_resolution and settings.canvas_resolution != settings.resolution:
+        if not canvas:
+            canvas = pygame.Surface(settings.canvas_resolution, 0, settings.display)
+        settings.window = canvas
+    else:
+        settings.window = settings.display
 
-            # Update active modules. These provide supplementary features
-            for module_name, module_obj in settings.modules.items():
-                module_obj.Update(events)
 
-        # Debug Logging
-        if show_fps:
-            print(settings.clock.get_fps())
+def SetResolution(value: str):
+    """ Switches the window to the provided resolution (IE. '1920x1080'). Only available in canvas mode """
+    previous_window = settings.window
+    settings.resolution = tuple(map(int, value.split('x')))
+    SetupDisplay()
+
+    # The canvas still holds the last frame, so it only needs presenting again. Switching between drawing to the canvas
+    # and drawing to the window directly requires a redraw
+    if settings.scene:
+        if settings.window is previous_window:
+            settings.scene.update_rects.append(settings.window.get_rect())
+        else:
+            settings.scene.full_redraw = True
+            settings.scene.Invalidate()
+
 
-        # Refresh any changes
+def Present(update_rects: list):
+    """ Presents the provided regions of the screen. In canvas mode, the whole canvas is scaled to the window instead """
+    if settings.window is settings.display:
+        pygame.display.update(update_rects)
+    elif update_rects:
+        pygame.transform.smoothscale(settings.window, settings.display.get_size(), settings.display)
         pygame.display.update()
 
-        # Get the time in miliseconds converted to seconds since the last frame. Used to avoid frame dependency
-        # on actions
-        settings.scene.delta_time = settings.clock.tick(60) / 1000
+
+def ToCanvas(pos: tuple) -> tuple:
+    """ Converts the provided window position to a position on the canvas """
+    if settings.window is settings.display:
+        return pos
+
+    return (
+        int(pos[0] * settings.window.get_width() / settings.display.get_width()),
+        int(pos[1] * settings.window.get_height() / settings.display.get_height())
+    )
+
+
+def MapMouseEvents(events: list) -> list:
+    """ Returns the provided events with any mouse positions converted from window positions to canvas positions """
+    mapped_events = []
+    for event in events:
+        if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            event = pygame.event.Event(event.type, {**event.dict, "pos": ToCanvas(event.pos)})
+        mapped_events.append(event)
+
+    return mapped_events
 
 
 def Pause() -> InterfacePause:
@@ -111,17 +325,38 @@ def Pause() -> InterfacePause:
         print("No pause interface set - Falling back to default")
         interface = settings.scene.LoadInterface("HBEngine/Content/Interfaces/pause_menu_01.interface", InterfacePause)
 
-    settings.scene.Draw()
+    settings.scene.Invalidate()
     settings.paused = True
     return interface
 
 
 def Unpause():
     settings.scene.UnloadInterface("!&HBENGINE_INTERNAL_PAUSE_INTERFACE!&")
-    settings.scene.Draw()
+    settings.scene.Invalidate()
     settings.paused = False
 
 
+def TogglePerfHUD():
+    """ Shows or hides the performance HUD. The profiler is enabled while it's shown, as that's where its data is from """
+    global perf_hud
+    global perf_hud_enabled_profiler
+
+    if perf_hud:
+        settings.scene.active_renderables.Remove(perf_hud.key)
+        settings.scene.Invalidate()
+        perf_hud = None
+        if perf_hud_enabled_profiler:
+            profiler.Disable()
+            perf_hud_enabled_profiler = False
+    else:
+        if not profiler.enabled:
+            profiler.Enable()
+            profiler.StartFrame()
+            perf_hud_enabled_profiler = True
+        perf_hud = PerfHUD()
+        settings.scene.active_renderables.Add(perf_hud)
+
+
 def LoadScene(partial_file_path: str):
     """ Deletes the active scene if applicable, and creates a new one using the provided scene file """
     # Validate the scene path
@@ -129,6 +364,14 @@ def LoadScene(partial_file_path: str):
     if not os.path.exists(scene_path):
         raise ValueError(f"Scene '{scene_path}' does not exist")
 
+    if profiler.enabled or tracer.enabled:
+        start_time = time.perf_counter()
+
+    # Stop everything in the existing scene
+    settings.pending_scene = None
+    if settings.scene:
+        settings.scene.Unload()
+
     # Shutdown any modules that shouldn't persist between scenes
     active_modules = list(settings.modules.items())
     for module_name, module_obj in active_modules:
@@ -139,6 +382,18 @@ def LoadScene(partial_file_path: str):
     settings.scene = None
     settings.scene = Scene(scene_data_file=scene_path)
     settings.scene.LoadSceneData()
+    preloader.Finish(partial_file_path)
+
+    # Debug overlays persist between scenes
+    if perf_hud:
+        settings.scene.active_renderables.Add(perf_hud)
+
+    if profiler.enabled or tracer.enabled:
+        end_time = time.perf_counter()
+        if profiler.enabled:
+            profiler.RecordSceneLoad(partial_file_path, end_time - start_time)
+        if tracer.enabled:
+            tracer.AddSpan("LoadScene", "loading", start_time, end_time, {"scene": partial_file_path})
 
 
 def LoadModule(module_obj: callable, module_file_path: str) -> bool:
@@ -190,7 +445,30 @@ def UnloadModule(module_name: str) -> bool:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", "--project_path", type=str, nargs="?", const="", help="A file path for a HBEngine Project")
+    parser.add_argument("--benchmark", type=str, metavar="SCENE", help="Run the provided scene file without a window, and report its performance as JSON")
+    parser.add_argument("--frames", type=int, default=600, help="The number of frames to run when benchmarking")
+    parser.add_argument("--input", type=str, help="A file of scripted input events to use when benchmarking")
+    parser.add_argument("--output", type=str, help="A file to write the benchmark report to instead of printing it")
+    parser.add_argument("--trace", type=str, metavar="FILE", help=f"Record a timeline of the engine's work, and write it to the provided file on exit in the Chrome trace format. Can also be enabled with the '{tracer.ENVIRONMENT_VARIABLE}' environment variable")
+    parser.add_argument("--action-stats", type=str, metavar="FILE", help="Record timings for each action, and write them to the provided file on exit (.csv or .json)")
     args = parser.parse_args()
-    print(args)
-    Initialize(args.project_path)
-    Main()
+
+    if args.action_stats:
+        action_stats.Enable()
+    if args.trace:
+        tracer.Enable(args.trace)
+
+    # The stats are dumped however the run ends, including when an action quits the game or an error is raised
+    try:
+        if args.benchmark:
+            from HBEngine.Core import benchmark
+            report = benchmark.Run(args.project_path, args.benchmark, args.frames, args.input, args.output)
+            if not args.output:
+                print(json.dumps(report, indent=4))
+        else:
+            print(args)
+            Initialize(args.project_path)
+            Main()
+    finally:
+        if args.action_stats:
+            action_stats.Dump(args.action_stats)
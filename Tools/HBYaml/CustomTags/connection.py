@@ -12,7 +12,7 @@ class Connection:
 
 
 """ Define the YAML -> Python representation"""
-def connection_constructor(loader: yaml.FullLoader, node: yaml.nodes.ScalarNode):
+def connection_constructor(loader: yaml.BaseLoader, node: yaml.nodes.ScalarNode):
     return Connection(loader.construct_scalar(node))
 
 
@@ -0,0 +1,152 @@
+"""
+    The Heartbeat Engine is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    The Heartbeat Engine is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+"""
+A cache of parsed HBYaml documents, stored in a compiled (pickled) form so repeat reads of the same file skip YAML
+parsing entirely. The cache is disabled by default, and is enabled by providing a cache directory (See 'Enable').
+
+Compiled documents are kept in two layers:
+    - In memory, keyed by the file's path, modification time and size. Repeat reads during a session only need to stat
+      the file
+    - On disk, in the cache directory. These persist between sessions, and are validated against a hash of the file's
+      contents
+
+Every read returns a freshly unpickled copy of the document, so callers are free to modify what they receive
+"""
+
+# Bump this whenever the compiled format, or how documents are parsed, changes. Compiled files with a different header
+# are ignored and replaced
+HEADER = b"HBYC" + (1).to_bytes(2, "little") + pickle.HIGHEST_PROTOCOL.to_bytes(1, "little")
+
+cache_dir = None
+max_memory_entries = 64
+
+# Structure: {<file_path>: (<mtime_ns>, <size>, <compiled_data>)}. Ordered from least to most recently used
+memory_entries = OrderedDict()
+memory_lock = threading.Lock()  # Files may be read from multiple threads (IE. The engine's preloader)
+
+stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "write_errors": 0
+}
+
+
+def Enable(new_cache_dir: str):
+    """
+    Enables the cache, storing compiled documents in the provided directory. The directory ignores itself in git, so
+    it's never committed alongside the project it belongs to
+    """
+    global cache_dir
+
+    os.makedirs(new_cache_dir, exist_ok=True)
+    cache_dir = new_cache_dir
+
+    ignore_path = os.path.join(new_cache_dir, ".gitignore")
+    if not os.path.exists(ignore_path):
+        try:
+            with open(ignore_path, "w") as ignore_file:
+                ignore_file.write("# Created by the HBYaml compiled cache\n*\n")
+        except OSError:
+            # The cache works without it
+            pass
+
+
+def Disable():
+    """ Disables the cache, and clears any compiled documents held in memory """
+    global cache_dir
+
+    cache_dir = None
+    with memory_lock:
+        memory_entries.clear()
+
+
+def IsEnabled() -> bool:
+    return cache_dir is not None
+
+
+def Read(file_path: str, parse: callable) -> any:
+    """
+    Returns the document for the provided file, using the compiled version if it's up to date. Otherwise, the file's
+    contents are passed to 'parse', and the result is compiled for future reads
+    """
+    file_stat = os.stat(file_path)
+    file_path = os.path.abspath(file_path)
+
+    # Memory layer
+    with memory_lock:
+        entry = memory_entries.get(file_path)
+        if entry and entry[0] == file_stat.st_mtime_ns and entry[1] == file_stat.st_size:
+            stats["memory_hits"] += 1
+            memory_entries.move_to_end(file_path)
+            return pickle.loads(entry[2])
+
+    with open(file_path) as f:
+        text = f.read()
+    digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    # Disk layer
+    compiled_path = os.path.join(cache_dir, hashlib.blake2b(file_path.encode(), digest_size=16).hexdigest())
+    compiled_data = _ReadCompiled(compiled_path, digest)
+    if compiled_data is not None:
+        stats["disk_hits"] += 1
+    else:
+        stats["misses"] += 1
+        compiled_data = pickle.dumps(parse(text), pickle.HIGHEST_PROTOCOL)
+        _WriteCompiled(compiled_path, digest, compiled_data)
+
+    with memory_lock:
+        memory_entries[file_path] = (file_stat.st_mtime_ns, file_stat.st_size, compiled_data)
+        memory_entries.move_to_end(file_path)
+        if len(memory_entries) > max_memory_entries:
+            memory_entries.popitem(last=False)
+
+    return pickle.loads(compiled_data)
+
+
+def GetStats() -> dict:
+    """ Returns a copy of the cache statistics """
+    return {**stats, "enabled": IsEnabled(), "memory_entries": len(memory_entries)}
+
+
+def _ReadCompiled(compiled_path: str, digest: bytes) -> bytes:
+    """ Returns the compiled data stored at the provided path if it matches the provided digest. Otherwise, returns 'None' """
+    try:
+        with open(compiled_path, "rb") as f:
+            if f.read(len(HEADER)) != HEADER or f.read(len(digest)) != digest:
+                return None
+            return f.read()
+    except OSError:
+        return None
+
+
+def _WriteCompiled(compiled_path: str, digest: bytes, compiled_data: bytes):
+    # Write to a temporary file first so an interrupted write can never leave a partial file in place
+    temp_path = f"{compiled_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(HEADER + digest + compiled_data)
+        os.replace(temp_path, compiled_path)
+    except OSError:
+        # The cache is purely an optimization. If it can't be written (IE. Read-only install), carry on without it
+        stats["write_errors"] += 1
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
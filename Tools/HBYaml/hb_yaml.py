@@ -12,23 +12,84 @@
     You should have received a copy of the GNU General Public License
     along with the Heartbeat Engine. If not, see <https://www.gnu.org/licenses/>.
 """
+import time
 import yaml
+from Tools.HBYaml import compiled_cache
 from Tools.HBYaml.CustomTags import connection
 
+# Prefer the LibYAML-based loader when PyYAML was built with it, as it's significantly faster than the pure Python one
+try:
+    from yaml import CSafeLoader as BaseLoader
+except ImportError:
+    from yaml import SafeLoader as BaseLoader
+
+
+class HBLoader(BaseLoader):
+    """ The loader used for all HBYaml files, with support for the custom tags used by the engine """
+
+
+class HBDumper(yaml.SafeDumper):
+    """ The dumper used for all HBYaml files, with support for the custom tags used by the engine """
+
+
+# Register custom tags once on our own loader and dumper so the shared PyYAML classes are left untouched
+HBLoader.add_constructor("!Connection", connection.connection_constructor)
+HBDumper.add_representer(connection.Connection, connection.connection_representer)
+
 
 class Reader:
+    # Counters for every file read. Times are in seconds, and include time spent in the compiled cache
+    stats = {
+        "reads": 0,
+        "read_time": 0.0,
+        "parses": 0,
+        "parse_time": 0.0
+    }
+
+    # Optionally called after every read and parse, allowing them to be traced. Called with the span name, start and end
+    # times (From 'time.perf_counter'), and a dict of details
+    listener = None
+
     @staticmethod
     def ReadAll(file_path: str):
         """
-        Given a file path, read in the contents of the file and return them
+        Given a file path, read in the contents of the file and return them. If the compiled cache is enabled, the
+        compiled version of the file is used when it's up to date
         """
-        loader = yaml.FullLoader
+        start_time = time.perf_counter()
 
-        # Add custom constructors that may be needed
-        loader.add_constructor("!Connection", connection.connection_constructor)
+        if compiled_cache.IsEnabled():
+            data = compiled_cache.Read(file_path, Reader.Parse)
+        else:
+            with open(file_path) as f:
+                data = Reader.Parse(f.read())
 
-        with open(file_path) as f:
-            return yaml.load(f, Loader=loader)
+        end_time = time.perf_counter()
+        Reader.stats["reads"] += 1
+        Reader.stats["read_time"] += end_time - start_time
+        if Reader.listener:
+            Reader.listener("Reader.ReadAll", start_time, end_time, {"file": file_path})
+
+        return data
+
+    @staticmethod
+    def Parse(text: str):
+        """ Given the contents of a HBYaml file, parse and return them """
+        start_time = time.perf_counter()
+        data = yaml.load(text, Loader=HBLoader)
+
+        end_time = time.perf_counter()
+        Reader.stats["parses"] += 1
+        Reader.stats["parse_time"] += end_time - start_time
+        if Reader.listener:
+            Reader.listener("Reader.Parse", start_time, end_time, {"size": len(text)})
+
+        return data
+
+    @staticmethod
+    def GetStats() -> dict:
+        """ Returns a copy of the read counters, including whether the faster LibYAML-based loader is in use """
+        return {**Reader.stats, "libyaml": BaseLoader is not yaml.SafeLoader}
 
 
 class Writer:
@@ -42,13 +103,7 @@ class Writer:
             if metadata:
                 file.write(metadata + "\n\n")
 
-            dumper = yaml.SafeDumper
-
-            # Add custom representors that may be needed
-            dumper.add_representer(connection.Connection, connection.connection_representer)
-
             # By default, yaml dumps data in a 'sorted order' instead of by 'insertion order'. As per this:
             # https://github.com/yaml/pyyaml/issues/110, you can specify 'sort_keys=False' to force the dump to
             # skip the sorting and use insertion order
-            return yaml.dump(data, file, sort_keys=False, Dumper=dumper)
-
+            return yaml.dump(data, file, sort_keys=False, Dumper=HBDumper)